@@ -0,0 +1,65 @@
+"""Split long documents into prompt-sized pieces and fan them out to Gemini.
+
+Text is cut on paragraph boundaries first, then on sentence boundaries, and
+packed greedily into chunks under a token budget. Chunk prompts run
+concurrently under a per-request semaphore and results come back in document
+order so they can be joined or passed to a reduce prompt.
+"""
+import asyncio
+import re
+
+# Rough estimate for English text with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _pieces(text, max_chars):
+    """Yield (separator, piece) pairs no longer than max_chars."""
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            yield "\n\n", paragraph
+            continue
+
+        separator = "\n\n"
+        for sentence in _SENTENCE_END.split(paragraph):
+            for i in range(0, len(sentence), max_chars):
+                yield separator, sentence[i:i + max_chars]
+                separator = " "
+
+
+def split_text(text, max_tokens):
+    """Split text into chunks of at most ``max_tokens`` estimated tokens."""
+    max_chars = max(max_tokens * CHARS_PER_TOKEN, 1)
+    chunks = []
+    current = ""
+
+    for separator, piece in _pieces(text, max_chars):
+        if current and len(current) + len(separator) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}{separator}{piece}" if current else piece
+
+    if current:
+        chunks.append(current)
+    return chunks or [text]
+
+
+async def map_chunks(chunks, build_prompt, generate, concurrency=4):
+    """Run ``generate(build_prompt(chunk))`` for every chunk, keeping order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(chunk):
+        async with semaphore:
+            response = await generate(build_prompt(chunk))
+            return response.text
+
+    return await asyncio.gather(*(run(chunk) for chunk in chunks))
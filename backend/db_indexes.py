@@ -0,0 +1,156 @@
+"""Declared MongoDB indexes and the startup migration that applies them.
+
+Every index the backend relies on is listed in ``required_indexes`` so there
+is one place to see what each query is served by. ``apply_indexes`` compares
+the declaration against ``index_information()``: missing indexes are built,
+TTL changes are applied in place with ``collMod``, and anything that cannot be
+fixed without a rebuild (e.g. a uniqueness change) is reported, not dropped.
+
+Building an index on a large collection (progress runs to millions of rows)
+can be left to an operator: with ``create=False`` the missing indexes are only
+reported, and ``python db_indexes.py`` applies them out of band.
+"""
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# Options that must match for an existing index to count as the declared one
+_STRUCTURAL_OPTIONS = ("unique", "sparse")
+
+
+@dataclass
+class IndexSpec:
+    collection: str
+    keys: list
+    options: dict = field(default_factory=dict)
+
+    @property
+    def name(self):
+        return self.options.get("name") or "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+    def describe(self):
+        return f"{self.collection}.{self.name}"
+
+
+def required_indexes(response_cache_ttl, tutor_session_ttl, transcription_job_ttl):
+    return [
+        # Listings, analytics and their keyset pagination order
+        IndexSpec("notes", [("document_id", 1), ("timestamp", -1), ("id", -1)]),
+        IndexSpec("progress", [("user_id", 1), ("timestamp", -1), ("id", -1)]),
+        # resources has none: ResourceCatalog loads it whole and sorts in memory
+        # Documents and search
+        IndexSpec("documents", [("document_id", 1)], {"unique": True}),
+        IndexSpec(
+            "search_index",
+            [("title", "text"), ("text", "text")],
+            {"weights": {"title": 5, "text": 1}, "default_language": "english", "name": "search_text"},
+        ),
+        IndexSpec("search_index", [("kind", 1), ("ref_id", 1)]),
+        IndexSpec("embeddings", [("source_id", 1), ("chunk", 1)], {"unique": True}),
+        # Video and transcription
+        IndexSpec("videos", [("video_id", 1)], {"unique": True}),
+        IndexSpec("videos", [("sha256", 1)]),
+        IndexSpec("videos", [("youtube_id", 1)]),
+        IndexSpec("transcripts", [("sha256", 1)], {"sparse": True}),
+        IndexSpec("transcripts", [("youtube_id", 1)], {"sparse": True}),
+        IndexSpec("transcription_jobs", [("job_id", 1)], {"unique": True}),
+        IndexSpec("transcription_jobs", [("status", 1), ("created_at", 1)]),
+        IndexSpec("transcription_jobs", [("content_key", 1), ("status", 1)]),
+        IndexSpec("transcription_jobs", [("updated_at", 1)], {"expireAfterSeconds": transcription_job_ttl}),
+        # Caches and sessions
+        IndexSpec("response_cache", [("created_at", 1)], {"expireAfterSeconds": response_cache_ttl}),
+        IndexSpec("tutor_sessions", [("session_id", 1)], {"unique": True}),
+        IndexSpec("tutor_sessions", [("updated_at", 1)], {"expireAfterSeconds": tutor_session_ttl}),
+    ]
+
+
+def _find_existing(spec, existing):
+    if spec.name in existing:
+        return existing[spec.name]
+    for info in existing.values():
+        if [(key, direction) for key, direction in info["key"]] == spec.keys:
+            return info
+    return None
+
+
+async def apply_indexes(db, specs, create=True):
+    """Bring the database in line with ``specs``; returns a report by outcome."""
+    report = {"present": [], "created": [], "updated": [], "missing": [], "conflicts": []}
+    existing_by_collection = {}
+
+    for spec in specs:
+        if spec.collection not in existing_by_collection:
+            existing_by_collection[spec.collection] = await db[spec.collection].index_information()
+        info = _find_existing(spec, existing_by_collection[spec.collection])
+
+        if info is None:
+            if not create:
+                report["missing"].append(spec.describe())
+                continue
+            try:
+                await db[spec.collection].create_index(spec.keys, **spec.options)
+                report["created"].append(spec.describe())
+            except Exception as e:
+                logger.warning(f"Could not create index {spec.describe()}: {e}")
+                report["missing"].append(spec.describe())
+            continue
+
+        if any(bool(info.get(option)) != bool(spec.options.get(option)) for option in _STRUCTURAL_OPTIONS):
+            report["conflicts"].append(spec.describe())
+            continue
+
+        ttl = spec.options.get("expireAfterSeconds")
+        if ttl is not None and info.get("expireAfterSeconds") != ttl:
+            if not create:
+                report["conflicts"].append(spec.describe())
+                continue
+            try:
+                await db.command("collMod", spec.collection,
+                                 index={"keyPattern": dict(spec.keys), "expireAfterSeconds": ttl})
+                report["updated"].append(spec.describe())
+            except Exception as e:
+                logger.warning(f"Could not update TTL on {spec.describe()}: {e}")
+                report["conflicts"].append(spec.describe())
+            continue
+
+        report["present"].append(spec.describe())
+
+    if report["missing"]:
+        logger.warning(f"Missing MongoDB indexes: {', '.join(report['missing'])}")
+    if report["conflicts"]:
+        logger.warning(f"MongoDB indexes differ from declaration, rebuild manually: {', '.join(report['conflicts'])}")
+    if report["created"] or report["updated"]:
+        logger.info(f"MongoDB indexes created: {report['created']}, TTL updated: {report['updated']}")
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Apply or check the declared MongoDB indexes")
+    parser.add_argument("--check", action="store_true", help="only report missing indexes")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        specs = required_indexes(
+            response_cache_ttl=int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', str(7 * 24 * 3600))),
+            tutor_session_ttl=int(os.environ.get('TUTOR_SESSION_TTL_SECONDS', str(30 * 24 * 3600))),
+            transcription_job_ttl=int(os.environ.get('TRANSCRIPTION_JOB_TTL_SECONDS', str(7 * 24 * 3600))),
+        )
+        report = await apply_indexes(client[os.environ['DB_NAME']], specs, create=not args.check)
+        print(json.dumps(report, indent=2))
+        client.close()
+
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""Persistent store for extracted PDF documents.
+
+Documents are keyed by the SHA-256 of the uploaded bytes, so the same PDF
+uploaded by a whole class is parsed once. Metadata lives in MongoDB and the
+extracted page texts are written to a JSON blob on disk; the returned
+``document_id`` can be sent to the AI endpoints instead of the full text.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def sha256_hex(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def join_pages(pages):
+    return "".join(page + "\n\n" for page in pages)
+
+
+class DocumentStore:
+    """MongoDB metadata plus on-disk page blobs, addressed by content hash."""
+
+    def __init__(self, collection, blob_dir):
+        self.collection = collection
+        self.blob_dir = Path(blob_dir)
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+
+    def _blob_path(self, document_id):
+        return self.blob_dir / f"{document_id}.json"
+
+    async def hash_upload(self, data):
+        return await asyncio.to_thread(sha256_hex, data)
+
+    async def get_metadata(self, document_id):
+        return await self.collection.find_one({"document_id": document_id}, {"_id": 0})
+
+    async def get_pages(self, document_id):
+        """Return stored page texts, or None if the blob is missing."""
+        path = self._blob_path(document_id)
+
+        def read():
+            if not path.exists():
+                return None
+            return json.loads(path.read_text(encoding="utf-8"))["pages"]
+
+        return await asyncio.to_thread(read)
+
+    async def get_text(self, document_id):
+        pages = await self.get_pages(document_id)
+        return join_pages(pages) if pages is not None else None
+
+    async def save(self, document_id, pages, filename=None, **stats):
+        """Write the page blob and upsert metadata; returns the metadata."""
+        path = self._blob_path(document_id)
+
+        def write():
+            if path.exists():
+                # Content-addressed: an existing blob already holds these pages
+                return
+            # A temp file per writer, so concurrent saves of one id never share it
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.blob_dir, prefix=f"{document_id}.", suffix=".tmp", delete=False
+            ) as tmp:
+                json.dump({"pages": pages}, tmp, ensure_ascii=False)
+            try:
+                os.replace(tmp.name, path)
+            except OSError:
+                os.unlink(tmp.name)
+                raise
+
+        await asyncio.to_thread(write)
+
+        metadata = {
+            "document_id": document_id,
+            "filename": filename,
+            "pages": len(pages),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **stats,
+        }
+        await self.collection.update_one(
+            {"document_id": document_id},
+            {"$setOnInsert": metadata},
+            upsert=True,
+        )
+        return metadata
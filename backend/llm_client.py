@@ -0,0 +1,155 @@
+"""Async access to Gemini for the API handlers.
+
+google-generativeai only exposes blocking calls for file uploads and the
+generation paths we use, so every call is pushed onto a dedicated thread pool
+and bounded by a semaphore. Handlers await the result instead of stalling the
+event loop.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import google.generativeai as genai
+
+import metrics
+import tracing
+
+DEFAULT_MODEL = 'gemini-2.0-flash'
+EMBEDDING_MODEL = 'models/text-embedding-004'
+
+logger = logging.getLogger(__name__)
+
+
+def _usage_attributes(response):
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return {}
+    return {
+        "gen_ai.usage.input_tokens": getattr(usage, "prompt_token_count", None),
+        "gen_ai.usage.output_tokens": getattr(usage, "candidates_token_count", None),
+    }
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a Gemini call does not finish within its timeout."""
+
+
+class LLMClient:
+    """Shared, concurrency-limited Gemini client."""
+
+    def __init__(self, max_concurrency=16, timeout=60.0, max_workers=None):
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or max_concurrency,
+            thread_name_prefix="gemini",
+        )
+
+    async def _call(self, call, operation, model, timeout):
+        timeout = timeout or self.timeout
+        labels = {"endpoint": metrics.current_endpoint.get(), "model": model, "operation": operation}
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            with metrics.gemini_in_flight.track(**labels), metrics.gemini_latency.time(**labels), \
+                    tracing.span(f"gemini {operation}", tracing.CLIENT, **{"gen_ai.request.model": model}) as span:
+                future = loop.run_in_executor(self._executor, call)
+                try:
+                    result = await asyncio.wait_for(future, timeout)
+                except asyncio.TimeoutError:
+                    metrics.gemini_requests.inc(outcome="timeout", **labels)
+                    logger.warning(f"Gemini call {operation} timed out after {timeout:g}s")
+                    raise LLMTimeoutError(f"Gemini request timed out after {timeout:g}s") from None
+                except Exception:
+                    metrics.gemini_requests.inc(outcome="error", **labels)
+                    raise
+                if span is not None:
+                    span.set_attributes(**_usage_attributes(result))
+        metrics.gemini_requests.inc(outcome="ok", **labels)
+        metrics.record_usage(model, result, labels["endpoint"])
+        return result
+
+    async def run(self, func, *args, timeout=None, **kwargs):
+        """Run a blocking genai call on the pool and await its result."""
+        operation = getattr(func, "__name__", "call")
+        return await self._call(partial(func, *args, **kwargs), operation, kwargs.get("model", "none"), timeout)
+
+    async def generate(self, contents, model_name=DEFAULT_MODEL, timeout=None, **kwargs):
+        """Generate content with `model_name` without blocking the event loop."""
+        timeout = timeout or self.timeout
+        model = genai.GenerativeModel(model_name)
+        call = partial(model.generate_content, contents, request_options={"timeout": timeout}, **kwargs)
+        return await self._call(call, "generate", model_name, timeout)
+
+    async def embed(self, texts, task_type="retrieval_document", model_name=EMBEDDING_MODEL, timeout=None):
+        """Embed a batch of texts in one call; returns one vector per text."""
+        call = partial(genai.embed_content, model=model_name, content=list(texts), task_type=task_type)
+        result = await self._call(call, "embed", model_name, timeout)
+        return result["embedding"]
+
+    async def stream(self, contents, model_name=DEFAULT_MODEL, timeout=None, **kwargs):
+        """Yield response chunks from a streaming generation as they arrive.
+
+        The blocking stream iterator is drained on the pool and handed over
+        through a queue; ``timeout`` bounds the wait for each next chunk.
+        """
+        timeout = timeout or self.timeout
+        model = genai.GenerativeModel(model_name)
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        finished = object()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                response = model.generate_content(
+                    contents, stream=True, request_options={"timeout": timeout}, **kwargs
+                )
+                for chunk in response:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+        labels = {"endpoint": metrics.current_endpoint.get(), "model": model_name, "operation": "stream"}
+        # Stays "cancelled" if the consumer stops reading early
+        outcome = "cancelled"
+        last_chunk = None
+        # Not activated: this generator yields back to the caller mid-span
+        span = tracing.start_span("gemini stream", tracing.CLIENT, **{"gen_ai.request.model": model_name})
+        async with self._semaphore:
+            loop.run_in_executor(self._executor, produce)
+            try:
+                with metrics.gemini_in_flight.track(**labels), metrics.gemini_latency.time(**labels):
+                    while True:
+                        try:
+                            item = await asyncio.wait_for(queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            outcome = "timeout"
+                            logger.warning(f"Gemini stream stalled for {timeout:g}s")
+                            raise LLMTimeoutError(f"Gemini stream timed out after {timeout:g}s") from None
+                        if item is finished:
+                            outcome = "ok"
+                            break
+                        if isinstance(item, Exception):
+                            outcome = "error"
+                            if span is not None:
+                                span.set_error(item)
+                            raise item
+                        last_chunk = item
+                        yield item
+            finally:
+                cancelled.set()
+                metrics.gemini_requests.inc(outcome=outcome, **labels)
+                # Usage metadata on the final chunk covers the whole response
+                metrics.record_usage(model_name, last_chunk, labels["endpoint"])
+                if span is not None:
+                    span.set_attributes(outcome=outcome, **_usage_attributes(last_chunk))
+                    span.end()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,212 @@
+"""Minimal Prometheus instrumentation rendered in the text exposition format.
+
+Counters, gauges and histograms keep their samples in dicts keyed by label
+values under a lock, so they can be updated from handlers and from the Gemini
+thread pool alike. ``REGISTRY.render()`` produces the body served at
+``/metrics``. Values owned by other objects (cache hit counters, queue sizes)
+are exported with ``CallbackMetric``, which reads them at scrape time.
+
+The HTTP middleware records the route template of the request being handled
+in ``current_endpoint``, so Gemini calls are attributed to the endpoint that
+made them; work started outside a request reports ``background``.
+"""
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+current_endpoint = contextvars.ContextVar("current_endpoint", default="background")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the enclosed block as in progress."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """Metric whose samples come from ``collect()`` -> {label values tuple: value}."""
+
+    def __init__(self, name, documentation, kind, collect, labelnames=(), registry=REGISTRY):
+        self.kind = kind
+        self.collect = collect
+        super().__init__(name, documentation, labelnames, registry)
+
+    def samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.collect().items()
+        ]
+
+
+# Shared metrics, updated from server.py and llm_client.py
+http_requests = Counter(
+    "studybridge_http_requests_total", "HTTP requests by endpoint and status",
+    ["method", "endpoint", "status"],
+)
+http_latency = Histogram(
+    "studybridge_http_request_duration_seconds", "Time until the response starts, by endpoint",
+    ["method", "endpoint"],
+)
+http_in_flight = Gauge(
+    "studybridge_http_requests_in_flight", "HTTP requests being handled", ["endpoint"],
+)
+http_errors = Counter(
+    "studybridge_http_errors_total", "Requests answered with a 5xx or an unhandled exception",
+    ["endpoint"],
+)
+gemini_requests = Counter(
+    "studybridge_gemini_requests_total", "Gemini calls by endpoint, model, operation and outcome",
+    ["endpoint", "model", "operation", "outcome"],
+)
+gemini_latency = Histogram(
+    "studybridge_gemini_request_duration_seconds", "Gemini call duration by endpoint, model and operation",
+    ["endpoint", "model", "operation"],
+)
+gemini_in_flight = Gauge(
+    "studybridge_gemini_requests_in_flight", "Gemini calls in progress",
+    ["endpoint", "model", "operation"],
+)
+gemini_tokens = Counter(
+    "studybridge_gemini_tokens_total", "Gemini tokens from usage metadata, by endpoint, model and direction",
+    ["endpoint", "model", "direction"],
+)
+
+
+def record_usage(model, response, endpoint="background"):
+    """Count prompt/response tokens reported in a Gemini response's usage metadata."""
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    response_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    if prompt_tokens:
+        gemini_tokens.inc(prompt_tokens, endpoint=endpoint, model=model, direction="prompt")
+    if response_tokens:
+        gemini_tokens.inc(response_tokens, endpoint=endpoint, model=model, direction="response")
@@ -0,0 +1,61 @@
+"""Keyset (cursor) pagination for MongoDB listings.
+
+A page is fetched by filtering past the sort key of the previous page's last
+document instead of skipping, so every page costs one index seek however deep
+the client goes. The cursor handed to clients is that sort key, JSON-encoded
+and base64url-wrapped; it is opaque to them and validated on the way back in,
+where anything but strings, numbers and null is rejected so a forged cursor
+cannot smuggle query operators into the filter.
+The last sort field must be unique so that ties are broken deterministically.
+"""
+import base64
+import binascii
+import json
+
+
+def encode_cursor(values):
+    payload = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, length):
+    """Return the sort key list from ``cursor``; raises ValueError if malformed."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Invalid cursor")
+    # Only scalars: a dict such as {"$ne": null} would become a query operator
+    if not all(value is None or (isinstance(value, (str, int, float)) and not isinstance(value, bool))
+               for value in values):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _after(sort, values):
+    """Filter matching documents that sort strictly after ``values``."""
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {sort[j][0]: values[j] for j in range(i)}
+        clause[field] = {"$gt" if direction > 0 else "$lt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+async def paginate(collection, query, sort, limit, cursor=None, projection=None):
+    """Return ``(documents, next_cursor)``; ``next_cursor`` is None on the last page.
+
+    ``_id`` is excluded by the projection, so every sort field must be a
+    regular document field.
+    """
+    if cursor:
+        query = {"$and": [query, _after(sort, decode_cursor(cursor, len(sort)))]}
+    projection = {"_id": 0, **(projection or {})}
+
+    docs = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor([docs[-1].get(field) for field, _ in sort])
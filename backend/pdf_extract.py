@@ -0,0 +1,125 @@
+"""PDF text extraction off the event loop.
+
+PyPDF2 is pure Python and CPU bound, so extraction runs in a process pool.
+Pages are split into fixed-size chunks that are extracted in parallel and
+yielded back in page order, which lets callers either join everything once or
+stream pages to the client as soon as the leading chunks are ready. A pool
+broken by a crashed worker is discarded and rebuilt on the next call.
+
+Every call takes the path of a PDF on disk rather than its bytes: workers open
+the file themselves, so the document is never pickled into a task. Uploads
+are streamed into a file from ``temp_pdf_path`` once and the caller removes it
+when done.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import PyPDF2
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+
+def count_pages(path):
+    return len(PyPDF2.PdfReader(path).pages)
+
+
+def extract_pages(path, start, stop):
+    """Extract text for pages [start, stop) of the PDF at ``path``. Runs inside a worker process."""
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def temp_pdf_path():
+    """Create an empty temporary file to receive an upload and return its path."""
+    fd, name = tempfile.mkstemp(prefix="studybridge-", suffix=".pdf")
+    os.close(fd)
+    return Path(name)
+
+
+class PdfExtractor:
+    """Process-pool backed PDF extractor shared by the API handlers."""
+
+    def __init__(self, max_workers=None, pages_per_chunk=8):
+        self.max_workers = max_workers
+        self.pages_per_chunk = pages_per_chunk
+        self._executor = None
+
+    @property
+    def executor(self):
+        # Created lazily so importing the server does not start workers
+        if self._executor is None:
+            # Forking a process that runs the event loop, Motor and the Gemini
+            # thread pool can copy locks held by other threads into the child;
+            # start workers from a clean process instead
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+        return self._executor
+
+    def _discard(self, executor):
+        """Drop a broken pool so the next call starts fresh workers."""
+        if self._executor is executor:
+            logger.warning("PDF worker pool broke (a worker died); recreating it")
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args):
+        executor = self.executor
+        try:
+            future = asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+        def check(done):
+            if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+                self._discard(executor)
+
+        future.add_done_callback(check)
+        return future
+
+    async def page_count(self, path):
+        with tracing.span("pypdf2 page_count"):
+            return await self._submit(count_pages, path)
+
+    async def iter_chunks(self, path, total_pages):
+        """Yield (first_page_index, [page_text, ...]) in page order.
+
+        Every chunk is submitted up front; results are awaited in order so the
+        first pages can be sent while later chunks are still being parsed.
+        """
+        futures = []
+        for start in range(0, total_pages, self.pages_per_chunk):
+            stop = min(start + self.pages_per_chunk, total_pages)
+            future = self._submit(extract_pages, path, start, stop)
+            # Chunks finish out of order, so each span ends with its own future
+            span = tracing.start_span("pypdf2 extract_pages", first_page=start, last_page=stop - 1)
+            if span is not None:
+                future.add_done_callback(lambda _, span=span: span.end())
+            futures.append((start, future))
+        try:
+            for start, future in futures:
+                yield start, await future
+        finally:
+            for _, future in futures:
+                future.cancel()
+
+    async def extract(self, path):
+        """Return the list of page texts for the whole document."""
+        total_pages = await self.page_count(path)
+        pages = []
+        async for _, chunk in self.iter_chunks(path, total_pages):
+            pages.extend(chunk)
+        return pages
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
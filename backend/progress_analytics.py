@@ -0,0 +1,106 @@
+"""Progress analytics computed inside MongoDB.
+
+One aggregation answers the whole ``/progress/{user_id}`` request: the
+``$match``/``$sort`` prefix is served by the ``(user_id, timestamp)`` index
+and a ``$facet`` fans the user's entries out into per-activity totals,
+overall averages, day and ISO-week buckets and the most recent entries.
+Nothing is capped, so counts stay correct however many entries a user has.
+
+Timestamps are stored as ISO-8601 strings, so days are their first ten
+characters and weeks are derived with ``$dateFromString``.
+"""
+from datetime import datetime, timedelta, timezone
+
+
+def _totals(group_id):
+    return {
+        "$group": {
+            "_id": group_id,
+            "count": {"$sum": 1},
+            "average_score": {"$avg": "$score"},
+            "average_duration_minutes": {"$avg": "$duration_minutes"},
+            "total_minutes": {"$sum": "$duration_minutes"},
+        }
+    }
+
+
+def progress_pipeline(user_id, days=30, weeks=12, recent=10):
+    since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).date().isoformat()
+    week_of = {
+        "$dateToString": {
+            "format": "%G-W%V",
+            "date": {"$dateFromString": {"dateString": "$timestamp", "onError": None, "onNull": None}},
+        }
+    }
+    return [
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"timestamp": -1}},
+        {
+            "$facet": {
+                "overall": [_totals(None)],
+                "by_activity": [_totals("$activity_type"), {"$sort": {"_id": 1}}],
+                "daily": [
+                    {"$match": {"timestamp": {"$gte": since}}},
+                    {"$group": {
+                        "_id": {"$substrCP": ["$timestamp", 0, 10]},
+                        "count": {"$sum": 1},
+                        "total_minutes": {"$sum": "$duration_minutes"},
+                    }},
+                    {"$sort": {"_id": 1}},
+                ],
+                "weekly": [
+                    {"$group": {
+                        "_id": week_of,
+                        "count": {"$sum": 1},
+                        "total_minutes": {"$sum": "$duration_minutes"},
+                    }},
+                    {"$match": {"_id": {"$ne": None}}},
+                    {"$sort": {"_id": -1}},
+                    {"$limit": weeks},
+                ],
+                "recent": [{"$limit": recent}, {"$project": {"_id": 0}}],
+            }
+        },
+    ]
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def _stats(bucket):
+    return {
+        "count": bucket["count"],
+        "average_score": _round(bucket["average_score"]),
+        "average_duration_minutes": _round(bucket["average_duration_minutes"]),
+        "total_minutes": bucket["total_minutes"],
+    }
+
+
+def summarize_progress(facets):
+    """Shape the single ``$facet`` result document into the API response."""
+    overall = facets["overall"][0] if facets["overall"] else {
+        "count": 0, "average_score": None, "average_duration_minutes": None, "total_minutes": 0,
+    }
+    by_activity = {bucket["_id"]: _stats(bucket) for bucket in facets["by_activity"]}
+    activity_counts = {activity: stats["count"] for activity, stats in by_activity.items()}
+    return {
+        "total_activities": overall["count"],
+        "pdfs_read": activity_counts.get("pdf_read", 0),
+        "videos_watched": activity_counts.get("video_watched", 0),
+        "quizzes_completed": activity_counts.get("quiz_completed", 0),
+        "activity_counts": activity_counts,
+        "by_activity": by_activity,
+        "average_score": _round(overall["average_score"]),
+        "average_duration_minutes": _round(overall["average_duration_minutes"]),
+        "total_minutes": overall["total_minutes"],
+        "daily": [
+            {"date": bucket["_id"], "count": bucket["count"], "total_minutes": bucket["total_minutes"]}
+            for bucket in facets["daily"]
+        ],
+        "weekly": [
+            {"week": bucket["_id"], "count": bucket["count"], "total_minutes": bucket["total_minutes"]}
+            for bucket in reversed(facets["weekly"])
+        ],
+        "recent_activities": facets["recent"],
+    }
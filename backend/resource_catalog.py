@@ -0,0 +1,128 @@
+"""In-memory catalog of the read-mostly ``resources`` collection.
+
+The whole collection is loaded at startup, sorted by (title, id) and grouped
+by category. The first page of every category is serialized to JSON once per
+refresh together with its ETag, so a plain ``/resources`` request is a
+dictionary lookup returning ready-made bytes. Deeper pages bisect into the
+sorted list with the same opaque cursors as ``pagination``.
+
+The catalog reloads whenever a MongoDB change stream reports a write. Change
+streams need a replica set; on a standalone server the catalog falls back to
+reloading every ``poll_seconds``.
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import logging
+
+from pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+ALL = None
+
+
+def _sort_key(resource):
+    return (resource.get("title") or "", resource.get("id") or "")
+
+
+class _Listing:
+    def __init__(self, resources):
+        self.resources = resources
+        self.keys = [_sort_key(resource) for resource in resources]
+
+    def render(self, start, limit):
+        """Return ``(body, etag)`` for ``limit`` resources from position ``start``."""
+        page = self.resources[start:start + limit]
+        next_cursor = encode_cursor(list(self.keys[start + limit - 1])) if start + limit < len(self.resources) else None
+        body = json.dumps({"resources": page, "next_cursor": next_cursor}, separators=(",", ":")).encode("utf-8")
+        return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+class ResourceCatalog:
+    def __init__(self, collection, page_size=100, poll_seconds=300):
+        self.collection = collection
+        self.page_size = page_size
+        self.poll_seconds = poll_seconds
+        self._listings = {ALL: _Listing([])}
+        self._first_pages = {}
+        self._loaded = False
+        self._task = None
+
+    async def refresh(self):
+        resources = await self.collection.find({}, {"_id": 0}).to_list(length=None)
+        resources.sort(key=_sort_key)
+
+        by_category = {ALL: resources}
+        for resource in resources:
+            by_category.setdefault(resource.get("category"), []).append(resource)
+
+        listings = {category: _Listing(items) for category, items in by_category.items()}
+        self._first_pages = {category: listing.render(0, self.page_size) for category, listing in listings.items()}
+        self._listings = listings
+        self._loaded = True
+        logger.info(f"Resource catalog loaded: {len(resources)} resources in {len(listings) - 1} categories")
+
+    async def page(self, category=ALL, cursor=None, limit=None):
+        """``(body, etag)`` for one page; raises ValueError on a bad cursor."""
+        if not self._loaded:
+            await self.refresh()
+        limit = limit or self.page_size
+        if cursor is None and limit == self.page_size:
+            cached = self._first_pages.get(category)
+            if cached is not None:
+                return cached
+
+        listing = self._listings.get(category) or _Listing([])
+        start = 0
+        if cursor:
+            key = tuple(decode_cursor(cursor, 2))
+            if not all(isinstance(value, str) for value in key):
+                raise ValueError("Invalid cursor")
+            start = bisect.bisect_right(listing.keys, key)
+        return listing.render(start, limit)
+
+    async def start(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning(f"Could not load resource catalog: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            opened = False
+            try:
+                async with self.collection.watch() as stream:
+                    opened = True
+                    # Pick up anything written before the stream opened
+                    await self.refresh()
+                    async for _ in stream:
+                        # Collapse a burst of writes into one reload
+                        while await stream.try_next() is not None:
+                            pass
+                        await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not opened:
+                    logger.info(f"Change streams unavailable ({e}); polling resources every {self.poll_seconds}s")
+                    await self._poll()
+                    return
+                logger.warning(f"Resource change stream failed: {e}")
+                await asyncio.sleep(self.poll_seconds)
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Resource catalog refresh failed: {e}")
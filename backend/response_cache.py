@@ -0,0 +1,80 @@
+"""Content-addressed cache for Gemini-backed text results.
+
+Teachers share the same document with a whole class, so identical requests
+are common. Results are keyed on a SHA-256 of the endpoint, its prompt
+template version and the exact inputs that reach the prompt. Lookups go to an
+in-process LRU first and fall back to a MongoDB collection whose documents
+expire through a TTL index.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(endpoint, version, content, **params):
+    """Stable hash of everything that influences a generated result."""
+    payload = json.dumps(
+        {"endpoint": endpoint, "version": version, "content": content, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier (memory, MongoDB) cache with hit/miss counters."""
+
+    def __init__(self, collection, max_entries=1024, ttl_seconds=7 * 24 * 3600):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        self._memory = LRUCache(maxsize=max_entries)
+        self.hits = {"memory": 0, "mongo": 0}
+        self.misses = 0
+
+    async def get(self, key):
+        value = self._memory.get(key)
+        if value is not None:
+            self.hits["memory"] += 1
+            return value
+
+        try:
+            doc = await self.collection.find_one({"_id": key}, {"value": 1})
+        except Exception as e:
+            logger.warning(f"Response cache lookup failed: {e}")
+            doc = None
+
+        if doc is None:
+            self.misses += 1
+            return None
+
+        self.hits["mongo"] += 1
+        self._memory[key] = doc["value"]
+        return doc["value"]
+
+    async def set(self, key, endpoint, value):
+        self._memory[key] = value
+        try:
+            await self.collection.replace_one(
+                {"_id": key},
+                {"endpoint": endpoint, "value": value, "created_at": datetime.now(timezone.utc)},
+                upsert=True,
+            )
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def stats(self):
+        hits = sum(self.hits.values())
+        total = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.hits["memory"],
+            "mongo_hits": self.hits["mongo"],
+            "misses": self.misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "memory_entries": len(self._memory),
+        }
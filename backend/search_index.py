@@ -0,0 +1,120 @@
+"""Full-text search over extracted documents, transcripts and notes.
+
+Searchable text is copied into one ``search_index`` collection with a
+weighted MongoDB text index. Documents are indexed page by page so hits
+point at a page and stay small; transcripts and notes are one entry each.
+Notes are private: they carry their owner's ``user_id`` and only match a
+search made with that id. Results are ranked by text score, paginated, and
+returned with a highlighted snippet around the first matching term.
+"""
+import html
+import logging
+import re
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+SNIPPET_RADIUS = 80
+
+
+def make_snippet(text, terms, radius=SNIPPET_RADIUS):
+    """Excerpt around the first matching term, HTML-escaped, matches in <mark>."""
+    if not terms:
+        return html.escape(text[:2 * radius])
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    match = pattern.search(text)
+    if match is None:
+        return html.escape(text[:2 * radius])
+
+    start = max(match.start() - radius, 0)
+    end = min(match.end() + radius, len(text))
+    excerpt = text[start:end]
+
+    parts, last = [], 0
+    for m in pattern.finditer(excerpt):
+        parts.append(html.escape(excerpt[last:m.start()]))
+        parts.append(f"<mark>{html.escape(m.group())}</mark>")
+        last = m.end()
+    parts.append(html.escape(excerpt[last:]))
+
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    return prefix + "".join(parts) + suffix
+
+
+def query_terms(query):
+    """Plain search words (quoted phrases included, negations excluded)."""
+    terms = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', query):
+        term = phrase or word
+        if not term.startswith("-"):
+            terms.append(term)
+    return terms
+
+
+class SearchIndex:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def _replace(self, kind, ref_id, entries):
+        now = datetime.now(timezone.utc).isoformat()
+        await self.collection.delete_many({"kind": kind, "ref_id": ref_id})
+        if entries:
+            await self.collection.insert_many(
+                [{"kind": kind, "ref_id": ref_id, "indexed_at": now, **entry} for entry in entries],
+                ordered=False,
+            )
+
+    async def index_document(self, document_id, filename, pages):
+        entries = [
+            {"part": i + 1, "title": filename or "", "text": page}
+            for i, page in enumerate(pages) if page.strip()
+        ]
+        await self._replace("document", document_id, entries)
+
+    async def index_transcript(self, video_id, title, transcript):
+        await self._replace("transcript", video_id, [{"title": title or "", "text": transcript}])
+
+    async def index_note(self, note):
+        await self._replace("note", note["id"], [{
+            "title": " ".join(note.get("highlights") or []),
+            "text": note["content"],
+            "document_id": note.get("document_id"),
+            "user_id": note.get("user_id"),
+        }])
+
+    async def search(self, query, kinds=None, document_id=None, user_id=None, page=1, page_size=20):
+        filters = {"$text": {"$search": query}}
+        if kinds:
+            filters["kind"] = {"$in": list(kinds)}
+        # Notes without an owner, or owned by someone else, never match
+        if user_id:
+            conditions = [{"$or": [{"kind": {"$ne": "note"}}, {"user_id": user_id}]}]
+        else:
+            conditions = [{"kind": {"$ne": "note"}}]
+        if document_id:
+            conditions.append({"$or": [{"ref_id": document_id}, {"document_id": document_id}]})
+        filters["$and"] = conditions
+
+        projection = {"_id": 0, "score": {"$meta": "textScore"}}
+        cursor = (
+            self.collection.find(filters, projection)
+            .sort([("score", {"$meta": "textScore"})])
+            .skip((page - 1) * page_size)
+            .limit(page_size + 1)
+        )
+        hits = await cursor.to_list(length=page_size + 1)
+
+        terms = query_terms(query)
+        results = [
+            {
+                "kind": hit["kind"],
+                "ref_id": hit["ref_id"],
+                "part": hit.get("part"),
+                "title": hit.get("title"),
+                "score": round(hit["score"], 4),
+                "snippet": make_snippet(hit["text"], terms),
+            }
+            for hit in hits[:page_size]
+        ]
+        return {"results": results, "page": page, "page_size": page_size, "has_more": len(hits) > page_size}
@@ -1,21 +1,45 @@
-from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 import uuid
 from datetime import datetime, timezone
-import PyPDF2
-import io
+import json
 import google.generativeai as genai
-import yt_dlp
-import tempfile
-import shutil
+import asyncio
+import time
+from functools import partial
+from cachetools import LRUCache
+from llm_client import LLMClient
+from response_cache import ResponseCache, cache_key
+from pdf_extract import PdfExtractor, temp_pdf_path
+from document_store import DocumentStore, join_pages
+from chunking import split_text, map_chunks, estimate_tokens
+from readability import ReadabilityStats, analyze, split_paragraphs
+from study_aids import parse_study_aid, generation_config as study_aid_generation_config
+from transcription_jobs import TranscriptionJobs
+from video_ingest import MULTIPART_OVERHEAD, InvalidUpload, StreamedUpload, UploadTooLarge, save_upload, download_youtube, youtube_video_id
+from transcript_store import TranscriptStore
+from transcript_parser import TranscriptParser, parse_transcript
+from transcript_index import SegmentIndex
+from search_index import SearchIndex
+from vector_index import VectorIndex
+from tutor_sessions import TutorSessions
+from db_indexes import apply_indexes, required_indexes
+from progress_analytics import progress_pipeline, summarize_progress
+from write_buffer import WriteBehindBuffer
+from pagination import paginate
+from resource_catalog import ResourceCatalog
+import metrics
+import tracing
+from video_store import VideoIndex, video_response
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -23,33 +47,108 @@ load_dotenv(ROOT_DIR / '.env')
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Every collection handed out records a tracing span per operation
+db = tracing.TracedDatabase(client[os.environ['DB_NAME']])
 
 # Gemini AI setup
 gemini_key = os.environ.get('GEMINI_API_KEY', '')
 if gemini_key:
     genai.configure(api_key=gemini_key)
 
+llm = LLMClient(
+    max_concurrency=int(os.environ.get('GEMINI_MAX_CONCURRENCY', '16')),
+    timeout=float(os.environ.get('GEMINI_TIMEOUT_SECONDS', '60')),
+    max_workers=int(os.environ.get('GEMINI_THREAD_POOL_SIZE', '0')) or None,
+)
+gemini_upload_timeout = float(os.environ.get('GEMINI_UPLOAD_TIMEOUT_SECONDS', '600'))
+# How long an uploaded video may stay in Gemini's PROCESSING state
+gemini_file_processing_timeout = float(os.environ.get('GEMINI_FILE_PROCESSING_TIMEOUT_SECONDS', '900'))
+# Deadline for the whole streamed transcript of one video
+gemini_transcription_timeout = float(os.environ.get('GEMINI_TRANSCRIPTION_TIMEOUT_SECONDS', '1800'))
+
+pdf_extractor = PdfExtractor(
+    max_workers=int(os.environ.get('PDF_WORKERS', '0')) or None,
+    pages_per_chunk=int(os.environ.get('PDF_PAGES_PER_CHUNK', '8')),
+)
+document_store = DocumentStore(
+    db.documents,
+    os.environ.get('DOCUMENT_STORE_DIR', str(ROOT_DIR / 'storage' / 'documents')),
+)
+search_index = SearchIndex(db.search_index)
+vector_index = VectorIndex(
+    db.embeddings,
+    llm.embed,
+    chunk_tokens=int(os.environ.get('EMBEDDING_CHUNK_TOKENS', '300')),
+    max_sources=int(os.environ.get('EMBEDDING_CACHE_SOURCES', '64')),
+)
+retrieval_top_k = int(os.environ.get('RETRIEVAL_TOP_K', '4'))
+# Uploaded and downloaded videos, pruned by a retention sweep
+video_index = VideoIndex(
+    db.videos,
+    os.environ.get('VIDEO_STORE_DIR', str(ROOT_DIR / 'storage' / 'videos')),
+    max_bytes=int(os.environ.get('VIDEO_STORE_MAX_BYTES', str(10 * 1024 ** 3))) or None,
+    max_age_seconds=int(float(os.environ.get('VIDEO_RETENTION_DAYS', '14')) * 24 * 3600) or None,
+    sweep_interval=int(os.environ.get('VIDEO_RETENTION_SWEEP_SECONDS', '3600')),
+    revalidate_seconds=float(os.environ.get('VIDEO_INDEX_REVALIDATE_SECONDS', '30')),
+)
+max_video_bytes = int(os.environ.get('MAX_VIDEO_UPLOAD_BYTES', str(100 * 1024 * 1024)))
+max_pdf_bytes = int(os.environ.get('MAX_PDF_UPLOAD_BYTES', str(50 * 1024 * 1024)))
+
+# Cache for generated text; bump a version whenever its prompt template changes
+response_cache = ResponseCache(
+    db.response_cache,
+    max_entries=int(os.environ.get('RESPONSE_CACHE_SIZE', '1024')),
+    ttl_seconds=int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', str(7 * 24 * 3600))),
+)
+
+PROMPT_VERSIONS = {
+    "simplify-content": 3,
+    "generate-study-aids": 3,
+    "translate-content": 2,
+}
+
+# Long documents are processed as token-budgeted chunks instead of being truncated
+chunk_token_budget = int(os.environ.get('CHUNK_TOKEN_BUDGET', '1500'))
+chunk_concurrency = int(os.environ.get('CHUNK_CONCURRENCY', '4'))
+
 # Create the main app
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
 # Models
 class SimplifyRequest(BaseModel):
-    content: str
+    content: Optional[str] = None
+    document_id: Optional[str] = None  # from /extract-pdf, used when content is omitted
     reading_level: int = 8
     disability_type: str = "general"
 
 class StudyAidsRequest(BaseModel):
-    content: str
+    content: Optional[str] = None
+    document_id: Optional[str] = None  # from /extract-pdf, used when content is omitted
     aid_type: str = "flashcards"  # flashcards, summary, keyterms, quiz
 
+class StudyAidsDocument(BaseModel):
+    content: Optional[str] = None
+    document_id: Optional[str] = None
+
+class StudyAidsBatchRequest(BaseModel):
+    content: Optional[str] = None
+    document_id: Optional[str] = None
+    documents: Optional[List[StudyAidsDocument]] = None  # overrides content/document_id
+    aid_types: List[str] = ["flashcards", "summary", "keyterms", "quiz"]
+
+class ReadabilityRequest(BaseModel):
+    content: Optional[str] = None
+    document_id: Optional[str] = None
+    granularity: Literal["document", "page", "paragraph"] = "document"
+
 class TextResponse(BaseModel):
     text: str
     reading_score: float = 0.0
 
 class TranslateRequest(BaseModel):
-    content: str
+    content: Optional[str] = None
+    document_id: Optional[str] = None  # from /extract-pdf, used when content is omitted
     target_language: str  # zh (Mandarin), hi (Hindi), ar (Arabic)
 
 class YouTubeRequest(BaseModel):
@@ -57,6 +156,8 @@ class YouTubeRequest(BaseModel):
 
 class TranscriptSegment(BaseModel):
     timestamp: str
+    start: Optional[float] = None  # seconds
+    end: Optional[float] = None
     text: str
 
 class VideoTranscriptResponse(BaseModel):
@@ -72,16 +173,25 @@ class ChatMessage(BaseModel):
     message: str
     context: Optional[str] = None
     student_level: Optional[str] = "general"
+    document_id: Optional[str] = None
+    video_id: Optional[str] = None
+    session_id: Optional[str] = None
+
+class TutorSessionCreate(BaseModel):
+    user_id: Optional[str] = None
+    student_level: Optional[str] = "general"
 
 class Note(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     content: str
     audio_url: Optional[str] = None
     document_id: str
+    user_id: Optional[str] = None
     timestamp: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
     highlights: Optional[List[str]] = []
 
 class ProgressEntry(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
     activity_type: str  # "pdf_read", "video_watched", "quiz_completed"
     content_id: str
@@ -89,6 +199,9 @@ class ProgressEntry(BaseModel):
     duration_minutes: Optional[int] = None
     timestamp: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
+class ProgressBatch(BaseModel):
+    entries: List[ProgressEntry] = Field(..., max_length=1000)
+
 class Resource(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     title: str
@@ -102,19 +215,89 @@ class Resource(BaseModel):
 async def root():
     return {"message": "StudyBridge API"}
 
+async def update_search_index(indexing) -> None:
+    """Await a search indexing call; failures are logged, never surfaced"""
+    try:
+        await indexing
+    except Exception as e:
+        logging.warning(f"Search indexing failed: {str(e)}")
+
+async def resolve_content(content: Optional[str], document_id: Optional[str]) -> str:
+    """Return request text, loading it from the document store when given an id"""
+    if content is not None:
+        return content
+    if not document_id:
+        raise HTTPException(status_code=400, detail="Either content or document_id is required")
+    text = await document_store.get_text(document_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return text
+
 @api_router.post("/extract-pdf")
-async def extract_pdf(file: UploadFile = File(...)):
-    """Extract text from PDF file"""
+async def extract_pdf(request: Request, stream: bool = False):
+    """Extract text from PDF file
+
+    The multipart file (form field ``file``) is streamed to a temporary file
+    and rejected once it passes MAX_PDF_UPLOAD_BYTES. Uploads are deduplicated
+    by SHA-256; the hash is returned as ``document_id``. With ``stream=true``
+    pages are sent as NDJSON lines as soon as they are extracted, followed by
+    a final ``done`` line carrying the document stats.
+    """
+    path = None
     try:
-        contents = await file.read()
-        pdf_file = io.BytesIO(contents)
+        # Refuse oversized bodies before reading any of them
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_pdf_bytes + MULTIPART_OVERHEAD:
+            raise HTTPException(status_code=413, detail=f"PDF exceeds the {max_pdf_bytes // (1024 * 1024)}MB limit")
         
-        # Extract text using PyPDF2
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
+        try:
+            file = await StreamedUpload(request, "file").open()
+        except InvalidUpload as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n\n"
+        path = await asyncio.to_thread(temp_pdf_path)
+        try:
+            _, document_id = await save_upload(file, path, max_pdf_bytes)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except InvalidUpload as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        metadata = await document_store.get_metadata(document_id)
+        stored_pages = await document_store.get_pages(document_id) if metadata else None
+        if stored_pages is not None:
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+            path = None
+        
+        if stream:
+            # The generator owns the spooled file from here on
+            response = StreamingResponse(
+                stream_pdf_pages(path, document_id, file.filename, stored_pages),
+                media_type="application/x-ndjson"
+            )
+            path = None
+            return response
+        
+        if stored_pages is not None:
+            page_readability = metadata.get("page_readability")
+            if page_readability is None:
+                # Stored before per-page stats were kept
+                page_readability = await asyncio.to_thread(
+                    lambda: [analyze(page).to_dict() for page in stored_pages]
+                )
+            return {
+                "document_id": document_id,
+                "text": join_pages(stored_pages),
+                "word_count": metadata["word_count"],
+                "reading_score": metadata["reading_score"],
+                "readability": metadata.get("readability"),
+                "page_readability": page_readability,
+                "pages": metadata["pages"]
+            }
+        
+        # The extractor's workers open the spooled upload by path
+        pages = await pdf_extractor.extract(path)
+        text = join_pages(pages)
         
         if not text.strip():
             return JSONResponse(
@@ -122,78 +305,397 @@ async def extract_pdf(file: UploadFile = File(...)):
                 content={"error": "No text found in PDF. File may be image-based or empty."}
             )
         
-        # Calculate basic readability score (simplified Flesch)
-        words = len(text.split())
-        sentences = text.count('.') + text.count('!') + text.count('?')
-        sentences = max(sentences, 1)
-        
-        avg_sentence_length = words / sentences
-        reading_score = 206.835 - (1.015 * avg_sentence_length)
-        reading_score = max(0, min(100, reading_score))
+        page_stats = await asyncio.to_thread(lambda: [analyze(page) for page in pages])
+        stats = sum(page_stats, ReadabilityStats())
+        page_readability = [page.to_dict() for page in page_stats]
+        await document_store.save(
+            document_id, pages, filename=file.filename,
+            word_count=stats.words, reading_score=stats.reading_score,
+            readability=stats.to_dict(), page_readability=page_readability
+        )
+        await update_search_index(search_index.index_document(document_id, file.filename, pages))
         
         return {
+            "document_id": document_id,
             "text": text,
-            "word_count": words,
-            "reading_score": round(reading_score, 2),
-            "pages": len(pdf_reader.pages)
+            "word_count": stats.words,
+            "reading_score": stats.reading_score,
+            "readability": stats.to_dict(),
+            "page_readability": page_readability,
+            "pages": len(pages)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"PDF extraction error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
+    finally:
+        if path is not None:
+            await asyncio.to_thread(path.unlink, missing_ok=True)
 
-@api_router.post("/simplify-content")
-async def simplify_content(request: SimplifyRequest):
-    """Simplify content using Gemini AI"""
+async def iter_stored_pages(pages: List[str]):
+    yield 0, pages
+
+async def stream_pdf_pages(path: Optional[Path], document_id: str, filename: Optional[str],
+                           stored_pages: Optional[List[str]]):
+    """NDJSON generator for streaming PDF extraction
+
+    ``path`` is the spooled upload, or None when the stored pages are replayed;
+    the generator removes it once it finishes.
+    """
+    stats = ReadabilityStats()
+    pages = []
+    page_readability = []
     try:
-        if not gemini_key:
-            return JSONResponse(
-                status_code=400,
-                content={"error": "Gemini API key not configured. Please set GEMINI_API_KEY."}
+        if stored_pages is not None:
+            chunks = iter_stored_pages(stored_pages)
+        else:
+            total_pages = await pdf_extractor.page_count(path)
+            chunks = pdf_extractor.iter_chunks(path, total_pages)
+        
+        async for start, chunk in chunks:
+            chunk_stats = await asyncio.to_thread(lambda: [analyze(page) for page in chunk])
+            for offset, (page_text, page_stats) in enumerate(zip(chunk, chunk_stats)):
+                stats += page_stats
+                pages.append(page_text)
+                page_readability.append(page_stats.to_dict())
+                yield json.dumps({
+                    "type": "page",
+                    "page": start + offset + 1,
+                    "text": page_text,
+                    "readability": page_readability[-1]
+                }) + "\n"
+        
+        if not any(page.strip() for page in pages):
+            yield json.dumps({"type": "error", "error": "No text found in PDF. File may be image-based or empty."}) + "\n"
+            return
+        
+        if stored_pages is None:
+            await document_store.save(
+                document_id, pages, filename=filename,
+                word_count=stats.words, reading_score=stats.reading_score,
+                readability=stats.to_dict(), page_readability=page_readability
             )
+            await update_search_index(search_index.index_document(document_id, filename, pages))
+        
+        yield json.dumps({
+            "type": "done",
+            "document_id": document_id,
+            "word_count": stats.words,
+            "reading_score": stats.reading_score,
+            "readability": stats.to_dict(),
+            "pages": len(pages)
+        }) + "\n"
+    except Exception as e:
+        logging.error(f"PDF streaming extraction error: {str(e)}")
+        yield json.dumps({"type": "error", "error": f"Error processing PDF: {str(e)}"}) + "\n"
+    finally:
+        if path is not None:
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+
+@api_router.get("/documents/{document_id}")
+async def get_document(document_id: str, include_text: bool = False):
+    """Get stored document metadata, optionally with its extracted text"""
+    try:
+        metadata = await document_store.get_metadata(document_id)
+        if not metadata:
+            raise HTTPException(status_code=404, detail="Document not found")
+        if include_text:
+            metadata["text"] = await document_store.get_text(document_id)
+        return metadata
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Get document error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving document: {str(e)}")
+
+@api_router.post("/readability")
+async def get_readability(request: ReadabilityRequest):
+    """Readability metrics for a text or stored document, per section
+
+    ``granularity`` is ``document``, ``page`` (stored documents only) or
+    ``paragraph``; sections are returned in order alongside the totals.
+    """
+    try:
+        if request.granularity == "page":
+            if not request.document_id:
+                raise HTTPException(status_code=400, detail="Page granularity requires a document_id")
+            sections = await document_store.get_pages(request.document_id)
+            if sections is None:
+                raise HTTPException(status_code=404, detail="Document not found")
+        else:
+            text = await resolve_content(request.content, request.document_id)
+            sections = split_paragraphs(text) if request.granularity == "paragraph" else [text]
+        
+        section_stats = await asyncio.to_thread(lambda: [analyze(section) for section in sections])
+        total = sum(section_stats, ReadabilityStats())
         
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        # Build disability-specific prompt
-        disability_guidance = {
-            "dyslexia": "Use simple sentence structure, short paragraphs, and clear formatting. Avoid complex words.",
-            "adhd": "Break into small chunks, use bullet points, highlight key information, keep it concise.",
-            "autism": "Be literal and specific, avoid idioms and metaphors, use clear structure and predictable patterns.",
-            "intellectual": "Use very simple language, short sentences, concrete examples, and repetition of key concepts.",
-            "general": "Use clear and simple language appropriate for the reading level."
+        return {
+            "granularity": request.granularity,
+            "readability": total.to_dict(),
+            "sections": [stats.to_dict() for stats in section_stats]
         }
-        
-        guidance = disability_guidance.get(request.disability_type.lower(), disability_guidance["general"])
-        
-        prompt = f"""You are an accessibility expert helping students with disabilities understand educational content.
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Readability error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error computing readability: {str(e)}")
+
+# Prompt templates; bump PROMPT_VERSIONS when changing any of these
+DISABILITY_GUIDANCE = {
+    "dyslexia": "Use simple sentence structure, short paragraphs, and clear formatting. Avoid complex words.",
+    "adhd": "Break into small chunks, use bullet points, highlight key information, keep it concise.",
+    "autism": "Be literal and specific, avoid idioms and metaphors, use clear structure and predictable patterns.",
+    "intellectual": "Use very simple language, short sentences, concrete examples, and repetition of key concepts.",
+    "general": "Use clear and simple language appropriate for the reading level."
+}
+
+LANGUAGE_NAMES = {
+    "zh": "Mandarin Chinese",
+    "hi": "Hindi",
+    "ar": "Arabic"
+}
+
+def simplify_prompt(content: str, disability_type: str, reading_level: int) -> str:
+    guidance = DISABILITY_GUIDANCE.get(disability_type.lower(), DISABILITY_GUIDANCE["general"])
+    return f"""You are an accessibility expert helping students with disabilities understand educational content.
 
 Original Content:
-{request.content[:3000]}
+{content}
 
-Task: Simplify this content for a student with {request.disability_type} at grade {request.reading_level} reading level.
+Task: Simplify this content for a student with {disability_type} at grade {reading_level} reading level.
 
 Guidelines: {guidance}
 
 Provide simplified version that maintains all key information but is more accessible:"""
+
+def translate_prompt(content: str, target_lang: str) -> str:
+    return f"""Translate the following text to {target_lang}. Maintain the meaning and context accurately.
+
+Original Text:
+{content}
+
+Provide only the translated text without any additional commentary."""
+
+def study_aid_prompt(aid_type: str, content: str) -> str:
+    prompts = {
+        "flashcards": f"""Create 5-7 flashcards from this content. Format as JSON array with 'front' and 'back' keys.
+
+Content: {content}
+
+Return only valid JSON array like: [{{"front": "question", "back": "answer"}}]""",
         
-        response = model.generate_content(prompt)
-        simplified_text = response.text
+        "summary": f"""Create a concise summary of this content in 3-4 bullet points:
+
+Content: {content}""",
         
-        # Calculate new reading score
-        words = len(simplified_text.split())
-        sentences = simplified_text.count('.') + simplified_text.count('!') + simplified_text.count('?')
-        sentences = max(sentences, 1)
-        reading_score = 206.835 - (1.015 * (words / sentences))
+        "keyterms": f"""Extract 5-7 key terms with definitions from this content. Format as JSON array.
+
+Content: {content}
+
+Return only valid JSON array like: [{{"term": "word", "definition": "meaning"}}]""",
         
-        return {
-            "simplified_text": simplified_text,
-            "reading_score": round(max(0, min(100, reading_score)), 2)
-        }
+        "quiz": f"""Create 5 multiple choice questions from this content. Format as JSON array.
+
+Content: {content}
+
+Return only valid JSON array like: [{{"question": "...", "options": ["A", "B", "C", "D"], "correct": 0}}]"""
+    }
+    return prompts.get(aid_type, prompts["summary"])
+
+def study_aid_reduce_prompt(aid_type: str, partials: List[str]) -> str:
+    """Prompt that merges per-chunk study aids into one set for the whole document"""
+    sections = "\n\n".join(f"Part {i + 1}:\n{partial}" for i, partial in enumerate(partials))
+    prompts = {
+        "flashcards": f"""These flashcard sets were generated from consecutive parts of one document. Merge them into a single set of 5-7 flashcards covering the most important ideas of the whole document. Remove duplicates.
+
+{sections}
+
+Return only valid JSON array like: [{{"front": "question", "back": "answer"}}]""",
         
+        "summary": f"""These summaries cover consecutive parts of one document. Combine them into a concise summary of the whole document in 3-4 bullet points:
+
+{sections}""",
+        
+        "keyterms": f"""These key term lists were extracted from consecutive parts of one document. Merge them into the 5-7 most important key terms with definitions. Remove duplicates.
+
+{sections}
+
+Return only valid JSON array like: [{{"term": "word", "definition": "meaning"}}]""",
+        
+        "quiz": f"""These quiz questions were generated from consecutive parts of one document. Select and refine 5 multiple choice questions that best cover the whole document.
+
+{sections}
+
+Return only valid JSON array like: [{{"question": "...", "options": ["A", "B", "C", "D"], "correct": 0}}]"""
+    }
+    return prompts.get(aid_type, prompts["summary"])
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def stream_generation(prompts: List[str], finalize, error_label: str):
+    """SSE generator streaming Gemini tokens for each prompt in order.
+
+    Text arrives as ``data: {"text": ...}`` events. Once every prompt is done,
+    ``finalize(full_text, last_chunks)`` builds the result sent in the closing
+    ``done`` event; ``last_chunks`` holds each prompt's final chunk, which
+    carries the usage metadata for that whole response.
+    """
+    parts = []
+    last_chunks = []
+    try:
+        for i, prompt in enumerate(prompts):
+            if i:
+                yield sse_event({"text": "\n\n"})
+            pieces = []
+            last_chunk = None
+            async for chunk in llm.stream(prompt):
+                pieces.append(chunk.text)
+                last_chunk = chunk
+                yield sse_event({"text": chunk.text})
+            parts.append("".join(pieces))
+            last_chunks.append(last_chunk)
+        yield sse_event(await finalize("\n\n".join(parts), last_chunks), event="done")
+    except Exception as e:
+        logging.error(f"{error_label}: {str(e)}")
+        yield sse_event({"error": str(e)}, event="error")
+
+async def replay_cached(text: str, result: dict):
+    yield sse_event({"text": text})
+    yield sse_event(result, event="done")
+
+def simplify_result(simplified_text: str) -> dict:
+    # Calculate new reading score
+    stats = analyze(simplified_text)
+    return {
+        "simplified_text": simplified_text,
+        "reading_score": stats.reading_score,
+        "readability": stats.to_dict()
+    }
+
+@api_router.post("/simplify-content")
+async def simplify_content(request: SimplifyRequest):
+    """Simplify content using Gemini AI
+
+    Long content is split into chunks that are simplified concurrently and
+    joined back in order.
+    """
+    try:
+        if not gemini_key:
+            return JSONResponse(
+                status_code=400,
+                content={"error": "Gemini API key not configured. Please set GEMINI_API_KEY."}
+            )
+        
+        content = await resolve_content(request.content, request.document_id)
+        
+        key = cache_key(
+            "simplify-content", PROMPT_VERSIONS["simplify-content"], content,
+            reading_level=request.reading_level, disability_type=request.disability_type,
+        )
+        cached = await response_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        parts = await map_chunks(
+            split_text(content, chunk_token_budget),
+            lambda chunk: simplify_prompt(chunk, request.disability_type, request.reading_level),
+            llm.generate,
+            concurrency=chunk_concurrency,
+        )
+        result = simplify_result("\n\n".join(parts))
+        await response_cache.set(key, "simplify-content", result)
+        return result
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Simplification error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error simplifying content: {str(e)}")
 
+@api_router.post("/simplify-content/stream")
+async def simplify_content_stream(request: SimplifyRequest):
+    """Stream simplified content as server-sent events"""
+    if not gemini_key:
+        return JSONResponse(
+            status_code=400,
+            content={"error": "Gemini API key not configured. Please set GEMINI_API_KEY."}
+        )
+    
+    content = await resolve_content(request.content, request.document_id)
+    key = cache_key(
+        "simplify-content", PROMPT_VERSIONS["simplify-content"], content,
+        reading_level=request.reading_level, disability_type=request.disability_type,
+    )
+    cached = await response_cache.get(key)
+    if cached is not None:
+        return sse_response(replay_cached(cached["simplified_text"], cached))
+    
+    async def finalize(simplified_text, last_chunks):
+        result = simplify_result(simplified_text)
+        await response_cache.set(key, "simplify-content", result)
+        return result
+    
+    prompts = [
+        simplify_prompt(chunk, request.disability_type, request.reading_level)
+        for chunk in split_text(content, chunk_token_budget)
+    ]
+    return sse_response(stream_generation(prompts, finalize, "Simplification stream error"))
+
+async def build_study_aid(content: str, aid_type: str) -> dict:
+    """Generate (or fetch from cache) one study aid for ``content``
+
+    Each chunk of a long document gets its own study aids, which are then
+    merged by a single reduce prompt.
+    """
+    key = cache_key(
+        "generate-study-aids", PROMPT_VERSIONS["generate-study-aids"], content,
+        aid_type=aid_type,
+    )
+    cached = await response_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    # JSON aids use Gemini's response-schema mode and are validated server-side
+    generate = partial(llm.generate, generation_config=study_aid_generation_config(aid_type))
+    chunks = split_text(content, chunk_token_budget)
+    partials = await map_chunks(
+        chunks,
+        lambda chunk: study_aid_prompt(aid_type, chunk),
+        generate,
+        concurrency=chunk_concurrency,
+    )
+    if len(partials) == 1:
+        final_prompt = study_aid_prompt(aid_type, chunks[0])
+        aid_text = partials[0]
+    else:
+        final_prompt = study_aid_reduce_prompt(aid_type, partials)
+        aid_text = (await generate(final_prompt)).text
+    
+    try:
+        aid_content = parse_study_aid(aid_type, aid_text)
+    except ValueError as e:
+        # Regenerate only the final step, once
+        logging.warning(f"Retrying {aid_type} generation: {str(e)}")
+        aid_content = parse_study_aid(aid_type, (await generate(final_prompt)).text)
+    
+    result = {
+        "type": aid_type,
+        "content": aid_content
+    }
+    await response_cache.set(key, "generate-study-aids", result)
+    return result
+
 @api_router.post("/generate-study-aids")
 async def generate_study_aids(request: StudyAidsRequest):
     """Generate study aids using Gemini AI"""
@@ -204,47 +706,72 @@ async def generate_study_aids(request: StudyAidsRequest):
                 content={"error": "Gemini API key not configured"}
             )
         
-        model = genai.GenerativeModel('gemini-2.0-flash')
+        content = await resolve_content(request.content, request.document_id)
+        return await build_study_aid(content, request.aid_type)
         
-        prompts = {
-            "flashcards": f"""Create 5-7 flashcards from this content. Format as JSON array with 'front' and 'back' keys.
-
-Content: {request.content[:2000]}
-
-Return only valid JSON array like: [{{"front": "question", "back": "answer"}}]""",
-            
-            "summary": f"""Create a concise summary of this content in 3-4 bullet points:
-
-Content: {request.content[:2000]}""",
-            
-            "keyterms": f"""Extract 5-7 key terms with definitions from this content. Format as JSON array.
-
-Content: {request.content[:2000]}
-
-Return only valid JSON array like: [{{"term": "word", "definition": "meaning"}}]""",
-            
-            "quiz": f"""Create 5 multiple choice questions from this content. Format as JSON array.
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Study aids generation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating study aids: {str(e)}")
 
-Content: {request.content[:2000]}
+@api_router.post("/generate-study-aids/batch")
+async def generate_study_aids_batch(request: StudyAidsBatchRequest):
+    """Generate several study aid types, for one or more documents, concurrently
 
-Return only valid JSON array like: [{{"question": "...", "options": ["A", "B", "C", "D"], "correct": 0}}]"""
-        }
-        
-        prompt = prompts.get(request.aid_type, prompts["summary"])
-        response = model.generate_content(prompt)
-        
-        return {
-            "type": request.aid_type,
-            "content": response.text
-        }
+    Results are returned per document in request order, keyed by aid type.
+    A failure in one aid is reported in ``errors`` without failing the batch.
+    """
+    try:
+        if not gemini_key:
+            return JSONResponse(
+                status_code=400,
+                content={"error": "Gemini API key not configured"}
+            )
         
+        documents = request.documents or [StudyAidsDocument(content=request.content, document_id=request.document_id)]
+        aid_types = list(dict.fromkeys(request.aid_types))
+        contents = await asyncio.gather(*(resolve_content(doc.content, doc.document_id) for doc in documents))
+        
+        outcomes = await asyncio.gather(
+            *(build_study_aid(content, aid_type) for content in contents for aid_type in aid_types),
+            return_exceptions=True
+        )
+        
+        results = []
+        for i, doc in enumerate(documents):
+            aids, errors = {}, {}
+            for j, aid_type in enumerate(aid_types):
+                outcome = outcomes[i * len(aid_types) + j]
+                if isinstance(outcome, Exception):
+                    logging.error(f"Study aids batch error ({aid_type}): {str(outcome)}")
+                    errors[aid_type] = str(outcome)
+                else:
+                    aids[aid_type] = outcome["content"]
+            results.append({"document_id": doc.document_id, "aids": aids, "errors": errors})
+        
+        return {"results": results}
+        
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Study aids generation error: {str(e)}")
+        logging.error(f"Study aids batch error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating study aids: {str(e)}")
 
+def translate_result(translated_text: str, target_language: str) -> dict:
+    return {
+        "translated_text": translated_text,
+        "target_language": target_language,
+        "language_name": LANGUAGE_NAMES.get(target_language, "English")
+    }
+
 @api_router.post("/translate-content")
 async def translate_content(request: TranslateRequest):
-    """Translate content to specified language using Gemini AI"""
+    """Translate content to specified language using Gemini AI
+
+    Long content is translated chunk by chunk, concurrently, and reassembled
+    in order.
+    """
     try:
         if not gemini_key:
             return JSONResponse(
@@ -252,55 +779,116 @@ async def translate_content(request: TranslateRequest):
                 content={"error": "Gemini API key not configured"}
             )
         
-        language_names = {
-            "zh": "Mandarin Chinese",
-            "hi": "Hindi",
-            "ar": "Arabic"
-        }
-        
-        target_lang = language_names.get(request.target_language, "English")
-        
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        prompt = f"""Translate the following text to {target_lang}. Maintain the meaning and context accurately.
-
-Original Text:
-{request.content[:3000]}
-
-Provide only the translated text without any additional commentary."""
-        
-        response = model.generate_content(prompt)
-        
-        return {
-            "translated_text": response.text,
-            "target_language": request.target_language,
-            "language_name": target_lang
-        }
-        
+        target_lang = LANGUAGE_NAMES.get(request.target_language, "English")
+        content = await resolve_content(request.content, request.document_id)
+        
+        key = cache_key(
+            "translate-content", PROMPT_VERSIONS["translate-content"], content,
+            target_language=request.target_language,
+        )
+        cached = await response_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        parts = await map_chunks(
+            split_text(content, chunk_token_budget),
+            lambda chunk: translate_prompt(chunk, target_lang),
+            llm.generate,
+            concurrency=chunk_concurrency,
+        )
+        
+        result = translate_result("\n\n".join(parts), request.target_language)
+        await response_cache.set(key, "translate-content", result)
+        return result
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Translation error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error translating content: {str(e)}")
 
+@api_router.post("/translate-content/stream")
+async def translate_content_stream(request: TranslateRequest):
+    """Stream a translation as server-sent events"""
+    if not gemini_key:
+        return JSONResponse(status_code=400, content={"error": "Gemini API key not configured"})
+    
+    target_lang = LANGUAGE_NAMES.get(request.target_language, "English")
+    content = await resolve_content(request.content, request.document_id)
+    key = cache_key(
+        "translate-content", PROMPT_VERSIONS["translate-content"], content,
+        target_language=request.target_language,
+    )
+    cached = await response_cache.get(key)
+    if cached is not None:
+        return sse_response(replay_cached(cached["translated_text"], cached))
+    
+    async def finalize(translated_text, last_chunks):
+        result = translate_result(translated_text, request.target_language)
+        await response_cache.set(key, "translate-content", result)
+        return result
+    
+    prompts = [translate_prompt(chunk, target_lang) for chunk in split_text(content, chunk_token_budget)]
+    return sse_response(stream_generation(prompts, finalize, "Translation stream error"))
+
 @api_router.post("/upload-video")
-async def upload_video(file: UploadFile = File(...)):
-    """Upload and process video file"""
+async def upload_video(request: Request):
+    """Upload and process video file
+
+    The multipart body is parsed as it arrives (form field ``file``), the
+    video streamed to disk in chunks and rejected once it passes
+    MAX_VIDEO_UPLOAD_BYTES, then deduplicated by SHA-256.
+    """
     try:
+        # Refuse oversized bodies before reading any of them
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_video_bytes + MULTIPART_OVERHEAD:
+            raise HTTPException(status_code=413, detail=f"Video exceeds the {max_video_bytes // (1024 * 1024)}MB limit")
+        
+        try:
+            file = await StreamedUpload(request, "file").open()
+        except InvalidUpload as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         # Validate file type
         if not file.content_type or not file.content_type.startswith('video/'):
             raise HTTPException(status_code=400, detail="File must be a video")
         
-        # Create temp directory for video storage
-        temp_dir = Path(tempfile.gettempdir()) / "studybridge_videos"
-        temp_dir.mkdir(exist_ok=True)
-        
         # Generate unique filename
         video_id = str(uuid.uuid4())
         file_extension = Path(file.filename).suffix
-        video_path = temp_dir / f"{video_id}{file_extension}"
+        video_path = video_index.video_dir / f"{video_id}{file_extension}"
         
         # Save uploaded file
-        with open(video_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        try:
+            size, sha256 = await save_upload(file, video_path, max_video_bytes)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except InvalidUpload as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        duplicate = await video_index.find_existing(sha256=sha256)
+        if duplicate:
+            video_path.unlink(missing_ok=True)
+            logging.info(f"Video upload matches existing video {duplicate['video_id']}")
+            return {
+                "video_id": duplicate["video_id"],
+                "filename": file.filename,
+                "path": duplicate["path"],
+                "deduplicated": True,
+                "message": "Video uploaded successfully"
+            }
+        
+        await video_index.register({
+            "video_id": video_id,
+            "source": "upload",
+            "filename": file.filename,
+            "path": str(video_path),
+            "size": size,
+            "sha256": sha256,
+            "content_type": file.content_type,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        })
         
         logging.info(f"Video uploaded: {video_path}")
         
@@ -308,57 +896,223 @@ async def upload_video(file: UploadFile = File(...)):
             "video_id": video_id,
             "filename": file.filename,
             "path": str(video_path),
+            "deduplicated": False,
             "message": "Video uploaded successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Video upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
 
+async def ingest_youtube(youtube_url: str, on_progress=None) -> dict:
+    """Download a YouTube video and register it; returns the API response body
+
+    A video already downloaded from the same YouTube id is reused without
+    downloading it again.
+    """
+    youtube_id = youtube_video_id(youtube_url)
+    if youtube_id:
+        existing = await video_index.find_existing(youtube_id=youtube_id)
+        if existing:
+            logging.info(f"YouTube video {youtube_id} already downloaded as {existing['video_id']}")
+            return {
+                "video_id": existing["video_id"],
+                "filename": existing["filename"],
+                "path": existing["path"],
+                "duration": existing.get("duration", 0),
+                "deduplicated": True,
+                "message": "YouTube video processed successfully"
+            }
+    
+    video_id = str(uuid.uuid4())
+    output_path = video_index.video_dir / f"{video_id}.mp4"
+    
+    info = await download_youtube(youtube_url, output_path, max_video_bytes, on_progress)
+    title = info.get('title', 'YouTube Video')
+    duration = info.get('duration', 0)
+    
+    await video_index.register({
+        "video_id": video_id,
+        "source": "youtube",
+        "youtube_id": info.get('id'),
+        "filename": f"{title}.mp4",
+        "path": str(output_path),
+        "size": output_path.stat().st_size if output_path.exists() else None,
+        "content_type": "video/mp4",
+        "duration": duration,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    })
+    
+    logging.info(f"YouTube video downloaded: {output_path}")
+    
+    return {
+        "video_id": video_id,
+        "filename": f"{title}.mp4",
+        "path": str(output_path),
+        "duration": duration,
+        "deduplicated": False,
+        "message": "YouTube video processed successfully"
+    }
+
+async def stream_youtube_ingest(youtube_url: str):
+    """NDJSON generator reporting download progress, then the final result"""
+    queue = asyncio.Queue()
+    last_percent = -1
+    
+    def on_progress(status):
+        nonlocal last_percent
+        total = status.get('total_bytes') or status.get('total_bytes_estimate')
+        downloaded = status.get('downloaded_bytes', 0)
+        percent = int(downloaded * 100 / total) if total else None
+        # yt_dlp calls hooks many times per second; forward whole-percent steps only
+        if status.get('status') == 'downloading' and percent == last_percent:
+            return
+        last_percent = percent
+        queue.put_nowait({
+            "type": "progress",
+            "status": status.get('status'),
+            "downloaded_bytes": downloaded,
+            "total_bytes": total,
+            "percent": percent
+        })
+    
+    task = asyncio.create_task(ingest_youtube(youtube_url, on_progress))
+    try:
+        while not task.done() or not queue.empty():
+            getter = asyncio.create_task(queue.get())
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield json.dumps(getter.result()) + "\n"
+            else:
+                getter.cancel()
+        yield json.dumps({"type": "done", **task.result()}) + "\n"
+    except Exception as e:
+        logging.error(f"YouTube processing error: {str(e)}")
+        yield json.dumps({"type": "error", "error": f"Error processing YouTube video: {str(e)}"}) + "\n"
+
 @api_router.post("/process-youtube")
-async def process_youtube(request: YouTubeRequest):
-    """Download and process YouTube video"""
+async def process_youtube(request: YouTubeRequest, stream: bool = False):
+    """Download and process YouTube video
+
+    With ``stream=true`` download progress is sent as NDJSON lines, followed
+    by a ``done`` line carrying the usual response fields.
+    """
+    if stream:
+        return StreamingResponse(
+            stream_youtube_ingest(request.youtube_url),
+            media_type="application/x-ndjson"
+        )
+    
     try:
-        # Create temp directory
-        temp_dir = Path(tempfile.gettempdir()) / "studybridge_videos"
-        temp_dir.mkdir(exist_ok=True)
-        
-        video_id = str(uuid.uuid4())
-        output_path = str(temp_dir / f"{video_id}.mp4")
-        
-        # Download YouTube video - simplified format selection
-        ydl_opts = {
-            'format': 'best[ext=mp4]/best',  # Simplified - get best single file format
-            'outtmpl': output_path,
-            'quiet': False,
-            'no_warnings': False,
-            'max_filesize': 100 * 1024 * 1024,  # 100MB limit
-            'merge_output_format': 'mp4',
-            'prefer_ffmpeg': True,
-        }
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(request.youtube_url, download=True)
-            title = info.get('title', 'YouTube Video')
-            duration = info.get('duration', 0)
-        
-        logging.info(f"YouTube video downloaded: {output_path}")
-        
-        return {
-            "video_id": video_id,
-            "filename": f"{title}.mp4",
-            "path": output_path,
-            "duration": duration,
-            "message": "YouTube video processed successfully"
-        }
+        return await ingest_youtube(request.youtube_url)
         
     except Exception as e:
         logging.error(f"YouTube processing error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing YouTube video: {str(e)}")
 
-@api_router.post("/transcribe-video")
+def transcription_key(entry) -> str:
+    """Identify the video content so duplicate jobs can be detected"""
+    if entry.youtube_id:
+        return f"youtube:{entry.youtube_id}"
+    if entry.sha256:
+        return f"sha256:{entry.sha256}"
+    return f"video:{entry.video_id}"
+
+async def delete_gemini_file(video_file):
+    try:
+        await llm.run(genai.delete_file, video_file.name)
+    except Exception as cleanup_error:
+        logging.warning(f"Cleanup error: {cleanup_error}")
+
+async def run_transcription(job: dict, report) -> dict:
+    """Job handler: upload the video to Gemini, wait for processing, transcribe"""
+    entry = await video_index.get(job['video_id'])
+    
+    if entry is None:
+        raise Exception("Video file not found")
+    
+    # Another job may have transcribed the same content since this one was queued
+    cached = await transcript_store.find(sha256=entry.sha256, youtube_id=entry.youtube_id)
+    if cached:
+        return {
+            "transcript": cached["transcript"],
+            "segments": parse_transcript(cached["transcript"], duration=entry.duration)
+        }
+    
+    video_path = entry.path
+    
+    logging.info(f"Transcribing video: {video_path}")
+    
+    # Upload video to Gemini Files API
+    await report("uploading")
+    video_file = await llm.run(genai.upload_file, path=str(video_path), timeout=gemini_upload_timeout)
+    
+    # Wait for file to be processed
+    await report("processing")
+    deadline = time.monotonic() + gemini_file_processing_timeout
+    with tracing.span("gemini wait_for_file", file=video_file.name):
+        while video_file.state.name == "PROCESSING":
+            if time.monotonic() >= deadline:
+                await delete_gemini_file(video_file)
+                raise Exception(f"Gemini did not finish processing the video within {gemini_file_processing_timeout:g}s")
+            await asyncio.sleep(2)
+            video_file = await llm.run(genai.get_file, video_file.name)
+    
+    if video_file.state.name == "FAILED":
+        await delete_gemini_file(video_file)
+        raise Exception("Video processing failed")
+    
+    # Generate transcript with Gemini
+    await report("transcribing")
+    prompt = """Please transcribe this video completely. Provide:
+1. Full transcript with timestamps in format [MM:SS]
+2. Clear paragraph breaks for different topics
+3. Include all spoken words accurately
+
+Format the output as:
+[00:00] transcript text here
+[00:30] more transcript text
+etc."""
+    
+    # Parse segments while the transcript streams in
+    parser = TranscriptParser(duration=entry.duration)
+    pieces = []
+    async for chunk in llm.stream([video_file, prompt], timeout=gemini_transcription_timeout):
+        pieces.append(chunk.text)
+        parser.feed(chunk.text)
+    transcript_text = "".join(pieces)
+    segments = parser.close()
+    
+    # Clean up the Gemini copy; the local file stays for playback and reuse
+    await delete_gemini_file(video_file)
+    
+    result = {
+        "transcript": transcript_text,
+        "segments": segments
+    }
+    await transcript_store.save(result, sha256=entry.sha256, youtube_id=entry.youtube_id)
+    await update_search_index(search_index.index_transcript(job['video_id'], entry.filename, transcript_text))
+    return result
+
+transcript_store = TranscriptStore(db.transcripts)
+
+transcription_jobs = TranscriptionJobs(
+    db.transcription_jobs,
+    run_transcription,
+    workers=int(os.environ.get('TRANSCRIPTION_WORKERS', '2')),
+    lease_seconds=int(os.environ.get('TRANSCRIPTION_LEASE_SECONDS', '300')),
+)
+
+@api_router.post("/transcribe-video", status_code=202)
 async def transcribe_video(video_id: str):
-    """Transcribe video using Gemini AI"""
+    """Queue a video for transcription with Gemini AI
+
+    Returns a job id immediately; poll ``/api/transcription-jobs/{job_id}``
+    for the transcript. Videos transcribed before (same upload hash or
+    YouTube id) are answered at once with ``status: completed``.
+    """
     try:
         if not gemini_key:
             return JSONResponse(
@@ -367,96 +1121,139 @@ async def transcribe_video(video_id: str):
             )
         
         # Find video file
-        temp_dir = Path(tempfile.gettempdir()) / "studybridge_videos"
-        video_files = list(temp_dir.glob(f"{video_id}.*"))
-        
-        if not video_files:
+        entry = await video_index.get(video_id)
+        if entry is None:
             raise HTTPException(status_code=404, detail="Video file not found")
         
-        video_path = video_files[0]
-        
-        logging.info(f"Transcribing video: {video_path}")
+        cached = await transcript_store.find(sha256=entry.sha256, youtube_id=entry.youtube_id)
+        if cached:
+            return JSONResponse(status_code=200, content={
+                "job_id": None,
+                "video_id": video_id,
+                "status": "completed",
+                "cached": True,
+                "transcript": cached["transcript"],
+                # Re-parsed so older cache entries also get numeric offsets
+                "segments": parse_transcript(cached["transcript"], duration=entry.duration),
+                "message": "Video transcribed successfully"
+            })
+        
+        # Students starting the same lecture share one queued/running job
+        content_key = transcription_key(entry)
+        job = await transcription_jobs.find_active(content_key=content_key)
+        if job is None:
+            job = await transcription_jobs.submit(video_id=video_id, content_key=content_key)
         
-        # Upload video to Gemini Files API
-        video_file = genai.upload_file(path=str(video_path))
-        
-        # Wait for file to be processed
-        import time
-        while video_file.state.name == "PROCESSING":
-            time.sleep(2)
-            video_file = genai.get_file(video_file.name)
-        
-        if video_file.state.name == "FAILED":
-            raise Exception("Video processing failed")
+        return {
+            "job_id": job["job_id"],
+            "video_id": video_id,
+            "status": job["status"],
+            "message": "Video queued for transcription"
+        }
         
-        # Generate transcript with Gemini
-        model = genai.GenerativeModel('gemini-2.0-flash')
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Transcription error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error transcribing video: {str(e)}")
+
+@api_router.get("/transcription-jobs/{job_id}")
+async def get_transcription_job(job_id: str):
+    """Get transcription job status; includes transcript and segments once completed"""
+    try:
+        job = await transcription_jobs.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Transcription job not found")
+        
+        response = {
+            "job_id": job["job_id"],
+            "video_id": job["video_id"],
+            "status": job["status"],
+            "stage": job.get("stage"),
+            "error": job.get("error")
+        }
+        if job["status"] == "completed":
+            response.update(job["result"])
+            response["message"] = "Video transcribed successfully"
+        return response
         
-        prompt = """Please transcribe this video completely. Provide:
-1. Full transcript with timestamps in format [MM:SS]
-2. Clear paragraph breaks for different topics
-3. Include all spoken words accurately
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Transcription job error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving transcription job: {str(e)}")
 
-Format the output as:
-[00:00] transcript text here
-[00:30] more transcript text
-etc."""
+# Segment indexes are immutable per video, so built ones are kept in memory
+segment_indexes = LRUCache(maxsize=int(os.environ.get('SEGMENT_INDEX_CACHE_SIZE', '256')))
+
+async def get_segment_index(video_id: str) -> SegmentIndex:
+    index = segment_indexes.get(video_id)
+    if index is not None:
+        return index
+    
+    entry = await video_index.get(video_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Video file not found")
+    transcript = await transcript_store.find(sha256=entry.sha256, youtube_id=entry.youtube_id)
+    if not transcript:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    
+    index = SegmentIndex(parse_transcript(transcript["transcript"], duration=entry.duration))
+    segment_indexes[video_id] = index
+    return index
+
+@api_router.get("/transcripts/{video_id}/segments")
+async def get_transcript_segments(video_id: str, t: Optional[float] = None,
+                                  start: Optional[float] = None, end: Optional[float] = None):
+    """Look up transcript segments by playback time
+
+    ``t`` returns the segment playing at that time; ``start``/``end`` return
+    every segment overlapping the window.
+    """
+    try:
+        index = await get_segment_index(video_id)
         
-        response = model.generate_content([video_file, prompt])
-        transcript_text = response.text
-        
-        # Parse transcript into segments
-        segments = []
-        lines = transcript_text.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if line and line.startswith('['):
-                # Extract timestamp and text
-                try:
-                    timestamp_end = line.index(']')
-                    timestamp = line[1:timestamp_end]
-                    text = line[timestamp_end + 1:].strip()
-                    if text:
-                        segments.append({
-                            "timestamp": timestamp,
-                            "text": text
-                        })
-                except ValueError:
-                    # If no proper timestamp, add as continuation
-                    if segments:
-                        segments[-1]["text"] += " " + line
-        
-        # Clean up video file after transcription
-        try:
-            video_path.unlink()
-            genai.delete_file(video_file.name)
-        except Exception as cleanup_error:
-            logging.warning(f"Cleanup error: {cleanup_error}")
+        if t is not None:
+            position, segment = index.at(t)
+            return {"index": position, "segment": segment}
         
-        return {
-            "transcript": transcript_text,
-            "segments": segments,
-            "message": "Video transcribed successfully"
-        }
+        if start is None and end is None:
+            return {"segments": index.segments}
         
+        return {"segments": index.between(start or 0.0, end if end is not None else float("inf"))}
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Transcription error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error transcribing video: {str(e)}")
+        logging.error(f"Transcript lookup error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving transcript: {str(e)}")
+
+@api_router.get("/transcripts/{video_id}/captions")
+async def get_transcript_captions(video_id: str, format: Literal["vtt", "srt"] = "vtt"):
+    """Export the transcript as WebVTT or SRT captions"""
+    try:
+        index = await get_segment_index(video_id)
+        if format == "srt":
+            return PlainTextResponse(index.to_srt(), media_type="application/x-subrip")
+        return PlainTextResponse(index.to_webvtt(), media_type="text/vtt")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Caption export error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error exporting captions: {str(e)}")
 
 @api_router.get("/video-file/{video_id}")
-async def get_video_file(video_id: str):
-    """Serve video file for playback"""
+async def get_video_file(video_id: str, request: Request):
+    """Serve video file for playback with Range and conditional GET support"""
     try:
-        temp_dir = Path(tempfile.gettempdir()) / "studybridge_videos"
-        video_files = list(temp_dir.glob(f"{video_id}.*"))
+        entry = await video_index.get(video_id)
         
-        if not video_files:
+        if entry is None:
             raise HTTPException(status_code=404, detail="Video file not found")
         
-        video_path = video_files[0]
-        return FileResponse(video_path, media_type="video/mp4")
+        return video_response(request, entry)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Video file error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving video: {str(e)}")
@@ -468,8 +1265,6 @@ async def describe_image(request: ImageDescriptionRequest):
         if not gemini_key:
             return JSONResponse(status_code=400, content={"error": "Gemini API key not configured"})
         
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
         prompt = f"""You are an accessibility expert helping visually impaired users understand images.
 
 Describe this image in detail for someone who cannot see it. Include:
@@ -483,7 +1278,7 @@ Describe this image in detail for someone who cannot see it. Include:
 
 Provide a clear, descriptive explanation."""
 
-        response = model.generate_content([prompt, request.image_url])
+        response = await llm.generate([prompt, request.image_url])
         
         return {"description": response.text}
         
@@ -491,113 +1286,337 @@ Provide a clear, descriptive explanation."""
         logging.error(f"Image description error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error describing image: {str(e)}")
 
-@api_router.post("/ai-tutor")
-async def ai_tutor(request: ChatMessage):
-    """AI tutor chatbot for personalized help"""
+async def retrieve_context(request: ChatMessage) -> Optional[str]:
+    """Top-k chunks of the referenced document/transcript relevant to the question, None on failure"""
+    sources = {}
+    if request.document_id:
+        sources[f"document:{request.document_id}"] = partial(document_store.get_text, request.document_id)
+    if request.video_id:
+        async def load_transcript():
+            entry = await video_index.get(request.video_id)
+            if entry is None:
+                return None
+            transcript = await transcript_store.find(sha256=entry.sha256, youtube_id=entry.youtube_id)
+            return transcript["transcript"] if transcript else None
+        sources[f"video:{request.video_id}"] = load_transcript
+    if not sources:
+        return None
+    
     try:
-        if not gemini_key:
-            return JSONResponse(status_code=400, content={"error": "Gemini API key not configured"})
-        
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        prompt = f"""You are an AI tutor specialized in helping students with disabilities understand educational content.
+        chunks = await vector_index.search(sources, request.message, k=retrieval_top_k)
+    except Exception as e:
+        # Excerpts only improve the answer; the tutor can still reply without them
+        logging.warning(f"Retrieval failed, answering without excerpts: {str(e)}")
+        return None
+    return "\n\n---\n\n".join(chunk["text"] for chunk in chunks) or None
+
+def usage_tokens(response, prompt: str, text: str):
+    """(prompt, response) token counts from Gemini usage metadata, estimated if absent"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage and getattr(usage, "prompt_token_count", None):
+        return usage.prompt_token_count, usage.candidates_token_count or 0
+    return estimate_tokens(prompt), estimate_tokens(text)
+
+def format_turns(turns: List[dict]) -> str:
+    return "\n".join(f"{turn['role'].capitalize()}: {turn['text']}" for turn in turns)
 
-Student Question: {request.message}
+async def summarize_tutor_turns(summary: str, turns: List[dict]):
+    prompt = f"""Update the running summary of a tutoring conversation with a student with disabilities.
+Keep the topics covered, what the student found difficult, and any explanations or examples they responded well to.
+Reply with the updated summary only, in under 200 words.
+
+Current summary:
+{summary or "(none)"}
+
+New conversation turns:
+{format_turns(turns)}"""
+    response = await llm.generate(prompt)
+    return (response.text.strip(), *usage_tokens(response, prompt, response.text))
+
+tutor_sessions = TutorSessions(
+    db.tutor_sessions,
+    summarize_tutor_turns,
+    window_turns=int(os.environ.get('TUTOR_WINDOW_TURNS', '12')),
+    compact_turns=int(os.environ.get('TUTOR_COMPACT_TURNS', '8')),
+    ttl_seconds=int(os.environ.get('TUTOR_SESSION_TTL_SECONDS', str(30 * 24 * 3600))),
+)
+
+async def load_tutor_session(request: ChatMessage) -> Optional[dict]:
+    if not request.session_id:
+        return None
+    session = await tutor_sessions.get(request.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Tutor session not found")
+    return session
+
+def tutor_prompt(request: ChatMessage, retrieved: Optional[str] = None, session: Optional[dict] = None) -> str:
+    excerpts = f"Relevant excerpts from the student's material:\n{retrieved}" if retrieved else ""
+    history = ""
+    if session:
+        if session["summary"]:
+            history += f"Summary of the earlier conversation:\n{session['summary']}\n\n"
+        # Only the window; older turns not yet compacted are left out of the prompt
+        recent = session["turns"][-tutor_sessions.window_turns:]
+        if recent:
+            history += f"Recent conversation:\n{format_turns(recent)}\n\n"
+    return f"""You are an AI tutor specialized in helping students with disabilities understand educational content.
+
+{history}Student Question: {request.message}
 {f"Context: {request.context}" if request.context else ""}
+{excerpts}
 Student Level: {request.student_level}
 
 Provide a clear, simple, and encouraging response. Break down complex concepts, use examples, and be patient."""
 
-        response = model.generate_content(prompt)
+@api_router.post("/ai-tutor")
+async def ai_tutor(request: ChatMessage):
+    """AI tutor chatbot for personalized help"""
+    try:
+        if not gemini_key:
+            return JSONResponse(status_code=400, content={"error": "Gemini API key not configured"})
         
-        return {
+        session = await load_tutor_session(request)
+        retrieved = await retrieve_context(request)
+        prompt = tutor_prompt(request, retrieved, session)
+        response = await llm.generate(prompt)
+        
+        result = {
             "response": response.text,
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
-        
+        if session:
+            prompt_tokens, response_tokens = usage_tokens(response, prompt, response.text)
+            await tutor_sessions.record(session["session_id"], request.message, response.text,
+                                        prompt_tokens, response_tokens)
+            result["session_id"] = session["session_id"]
+            result["tokens"] = {"prompt": prompt_tokens, "response": response_tokens}
+        return result
+        
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"AI tutor error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error with AI tutor: {str(e)}")
 
+@api_router.post("/ai-tutor/stream")
+async def ai_tutor_stream(request: ChatMessage):
+    """Stream the AI tutor reply as server-sent events"""
+    if not gemini_key:
+        return JSONResponse(status_code=400, content={"error": "Gemini API key not configured"})
+    
+    try:
+        session = await load_tutor_session(request)
+        retrieved = await retrieve_context(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"AI tutor session error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error with AI tutor: {str(e)}")
+    prompt = tutor_prompt(request, retrieved, session)
+    
+    async def finalize(text, last_chunks):
+        result = {
+            "response": text,
+            "timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        if session:
+            # The final chunk's usage metadata covers the whole streamed reply
+            prompt_tokens, response_tokens = usage_tokens(last_chunks[0], prompt, text)
+            await tutor_sessions.record(session["session_id"], request.message, text,
+                                        prompt_tokens, response_tokens)
+            result["session_id"] = session["session_id"]
+            result["tokens"] = {"prompt": prompt_tokens, "response": response_tokens}
+        return result
+    
+    return sse_response(stream_generation([prompt], finalize, "AI tutor stream error"))
+
+@api_router.post("/tutor-sessions")
+async def create_tutor_session(request: TutorSessionCreate):
+    """Start a tutor conversation whose history is kept server-side"""
+    try:
+        session = await tutor_sessions.create(user_id=request.user_id, student_level=request.student_level)
+        return {
+            "session_id": session["session_id"],
+            "created_at": session["created_at"].isoformat()
+        }
+    except Exception as e:
+        logging.error(f"Create tutor session error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error creating tutor session: {str(e)}")
+
+@api_router.get("/tutor-sessions/{session_id}")
+async def get_tutor_session(session_id: str):
+    """Return the session summary, recent turns and token usage"""
+    try:
+        session = await tutor_sessions.get(session_id)
+        if not session:
+            raise HTTPException(status_code=404, detail="Tutor session not found")
+        tokens = session["tokens"]
+        return {
+            "session_id": session["session_id"],
+            "user_id": session.get("user_id"),
+            "summary": session["summary"],
+            "turns": [
+                {"role": turn["role"], "text": turn["text"], "timestamp": turn["at"].isoformat()}
+                for turn in session["turns"]
+            ],
+            "turn_count": session["turn_count"],
+            "tokens": {**tokens, "total": sum(tokens.values())},
+            "updated_at": session["updated_at"].isoformat()
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Get tutor session error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching tutor session: {str(e)}")
+
+@api_router.delete("/tutor-sessions/{session_id}")
+async def delete_tutor_session(session_id: str):
+    """End a tutor conversation and discard its history"""
+    try:
+        if not await tutor_sessions.delete(session_id):
+            raise HTTPException(status_code=404, detail="Tutor session not found")
+        return {"message": "Tutor session deleted"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Delete tutor session error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error deleting tutor session: {str(e)}")
+
 @api_router.post("/save-note")
 async def save_note(note: Note):
     """Save student notes"""
     try:
         note_dict = note.dict()
         await db.notes.insert_one(note_dict)
+        await update_search_index(search_index.index_note(note_dict))
         return {"message": "Note saved successfully", "note_id": note.id}
     except Exception as e:
         logging.error(f"Save note error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error saving note: {str(e)}")
 
 @api_router.get("/notes/{document_id}")
-async def get_notes(document_id: str):
-    """Get notes for a document"""
+async def get_notes(document_id: str, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=500)):
+    """Get notes for a document, newest first
+    
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page.
+    """
     try:
-        notes = await db.notes.find({"document_id": document_id}).to_list(length=100)
-        # Convert ObjectId to string for JSON serialization
-        for note in notes:
-            if '_id' in note:
-                del note['_id']
-        return {"notes": notes}
+        notes, next_cursor = await paginate(
+            db.notes, {"document_id": document_id}, [("timestamp", -1), ("id", -1)], limit, cursor
+        )
+        return {"notes": notes, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logging.error(f"Get notes error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving notes: {str(e)}")
 
+# Progress events are buffered and written in bulk
+progress_buffer = WriteBehindBuffer(
+    db.progress,
+    batch_size=int(os.environ.get('PROGRESS_BATCH_SIZE', '500')),
+    flush_interval=float(os.environ.get('PROGRESS_FLUSH_INTERVAL_SECONDS', '1.0')),
+    max_pending=int(os.environ.get('PROGRESS_MAX_PENDING', '10000')),
+)
+
 @api_router.post("/track-progress")
 async def track_progress(entry: ProgressEntry):
     """Track student progress"""
     try:
-        entry_dict = entry.dict()
-        await db.progress.insert_one(entry_dict)
+        await progress_buffer.add([entry.dict()])
         return {"message": "Progress tracked successfully"}
     except Exception as e:
         logging.error(f"Track progress error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error tracking progress: {str(e)}")
 
+@api_router.post("/track-progress/batch")
+async def track_progress_batch(batch: ProgressBatch):
+    """Track many progress events in one request"""
+    try:
+        await progress_buffer.add(entry.dict() for entry in batch.entries)
+        return {"message": "Progress tracked successfully", "accepted": len(batch.entries)}
+    except Exception as e:
+        logging.error(f"Track progress batch error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error tracking progress: {str(e)}")
+
 @api_router.get("/progress/{user_id}")
-async def get_progress(user_id: str):
-    """Get user progress analytics"""
+async def get_progress(user_id: str, days: int = Query(30, ge=1, le=366), weeks: int = Query(12, ge=1, le=104)):
+    """Get user progress analytics
+    
+    Computed by a single aggregation; ``days``/``weeks`` size the activity buckets.
+    """
     try:
-        progress_entries = await db.progress.find({"user_id": user_id}).to_list(length=1000)
-        
-        # Remove ObjectId
-        for entry in progress_entries:
-            if '_id' in entry:
-                del entry['_id']
-        
-        # Calculate analytics
-        total_activities = len(progress_entries)
-        pdf_count = len([e for e in progress_entries if e.get('activity_type') == 'pdf_read'])
-        video_count = len([e for e in progress_entries if e.get('activity_type') == 'video_watched'])
-        
-        return {
-            "total_activities": total_activities,
-            "pdfs_read": pdf_count,
-            "videos_watched": video_count,
-            "recent_activities": progress_entries[-10:] if progress_entries else []
-        }
+        facets = await db.progress.aggregate(progress_pipeline(user_id, days=days, weeks=weeks)).to_list(length=1)
+        return summarize_progress(facets[0])
     except Exception as e:
         logging.error(f"Get progress error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving progress: {str(e)}")
 
+@api_router.get("/progress/{user_id}/entries")
+async def get_progress_entries(user_id: str, cursor: Optional[str] = None, limit: int = Query(100, ge=1, le=1000)):
+    """List a user's progress entries, newest first"""
+    try:
+        entries, next_cursor = await paginate(
+            db.progress, {"user_id": user_id}, [("timestamp", -1), ("id", -1)], limit, cursor
+        )
+        return {"entries": entries, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.error(f"Get progress entries error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving progress: {str(e)}")
+
+resource_catalog = ResourceCatalog(
+    db.resources,
+    page_size=100,
+    poll_seconds=int(os.environ.get('RESOURCE_CATALOG_POLL_SECONDS', '300')),
+)
+
 @api_router.get("/resources")
-async def get_resources(category: Optional[str] = None):
-    """Get educational resources"""
+async def get_resources(request: Request, category: Optional[str] = None, cursor: Optional[str] = None,
+                        limit: int = Query(100, ge=1, le=500)):
+    """Get educational resources ordered by title
+    
+    Served from the in-memory catalog as pre-serialized JSON with an ETag.
+    """
     try:
-        query = {"category": category} if category else {}
-        resources = await db.resources.find(query).to_list(length=100)
-        
-        # Remove ObjectId
-        for resource in resources:
-            if '_id' in resource:
-                del resource['_id']
-        
-        return {"resources": resources}
+        body, etag = await resource_catalog.page(category, cursor, limit)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logging.error(f"Get resources error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving resources: {str(e)}")
 
+@api_router.get("/cache-stats")
+async def get_cache_stats():
+    """Hit/miss counters for the generated-content cache"""
+    return response_cache.stats()
+
+@api_router.get("/search")
+async def search(q: str, kind: Optional[List[Literal["document", "transcript", "note"]]] = Query(None),
+                 document_id: Optional[str] = None, user_id: Optional[str] = None,
+                 page: int = Query(1, ge=1), page_size: int = Query(20, ge=1, le=50)):
+    """Ranked full-text search over documents, transcripts and notes
+
+    Notes are only searched when ``user_id`` is given, and only that user's.
+    """
+    try:
+        if not q.strip():
+            raise HTTPException(status_code=400, detail="Search query is required")
+        return await search_index.search(
+            q, kinds=kind, document_id=document_id, user_id=user_id, page=page, page_size=page_size
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error searching: {str(e)}")
+
 @api_router.post("/voice-command")
 async def process_voice_command(command: dict):
     """Process voice commands for accessibility"""
@@ -627,6 +1646,90 @@ async def process_voice_command(command: dict):
 # Include router
 app.include_router(api_router)
 
+metrics.CallbackMetric(
+    "studybridge_response_cache_requests_total", "Generated-content cache lookups by result", "counter",
+    lambda: {
+        ("memory_hit",): response_cache.hits["memory"],
+        ("mongo_hit",): response_cache.hits["mongo"],
+        ("miss",): response_cache.misses,
+    },
+    labelnames=["result"],
+)
+metrics.CallbackMetric(
+    "studybridge_response_cache_hit_ratio", "Share of cache lookups answered from either tier", "gauge",
+    lambda: {(): response_cache.stats()["hit_ratio"]},
+)
+metrics.CallbackMetric(
+    "studybridge_progress_buffer_pending", "Progress entries waiting to be written", "gauge",
+    lambda: {(): progress_buffer.stats()["pending"]},
+)
+
+def route_template(request: Request) -> str:
+    """Path template of the matching route, so metric labels stay bounded"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    endpoint = route_template(request)
+    start = time.perf_counter()
+    # Copied into the handler's context, so its Gemini calls carry the route too
+    token = metrics.current_endpoint.set(endpoint)
+    with metrics.http_in_flight.track(endpoint=endpoint):
+        try:
+            response = await call_next(request)
+        except Exception:
+            metrics.http_errors.inc(endpoint=endpoint)
+            metrics.http_requests.inc(method=request.method, endpoint=endpoint, status="500")
+            raise
+        finally:
+            metrics.current_endpoint.reset(token)
+    metrics.http_latency.observe(time.perf_counter() - start, method=request.method, endpoint=endpoint)
+    metrics.http_requests.inc(method=request.method, endpoint=endpoint, status=str(response.status_code))
+    if response.status_code >= 500:
+        metrics.http_errors.inc(endpoint=endpoint)
+    return response
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    endpoint = route_template(request)
+    root, token = tracing.start_trace(
+        f"{request.method} {endpoint}", tracing.SERVER,
+        **{"http.method": request.method, "http.route": endpoint, "http.target": request.url.path}
+    )
+    try:
+        response = await call_next(request)
+    except Exception as e:
+        root.set_error(e)
+        tracing.end_trace(root)
+        raise
+    finally:
+        # The response body may still be streaming; the root span ends with it
+        tracing.detach(token)
+    root.set_attributes(**{"http.status_code": response.status_code})
+    if response.status_code >= 500:
+        root.set_error(f"HTTP {response.status_code}")
+    
+    body = response.body_iterator
+    
+    async def traced_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            tracing.end_trace(root)
+    
+    response.body_iterator = traced_body()
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -642,6 +1745,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Request tracing: OTLP/JSON export to a file and/or collector, slow-trace log
+tracing.configure(
+    service_name=os.environ.get('TRACE_SERVICE_NAME', 'studybridge-backend'),
+    export_file=os.environ.get('TRACE_EXPORT_FILE') or None,
+    export_url=os.environ.get('TRACE_EXPORT_URL') or None,
+    slow_ms=float(os.environ.get('TRACE_SLOW_REQUEST_MS', '5000')),
+)
+
+@app.on_event("startup")
+async def startup_services():
+    specs = required_indexes(
+        response_cache_ttl=response_cache.ttl_seconds,
+        tutor_session_ttl=tutor_sessions.ttl_seconds,
+        transcription_job_ttl=int(os.environ.get('TRANSCRIPTION_JOB_TTL_SECONDS', str(7 * 24 * 3600))),
+    )
+    try:
+        await apply_indexes(db, specs, create=os.environ.get('MONGO_AUTO_CREATE_INDEXES', 'true').lower() == 'true')
+    except Exception as e:
+        logger.warning(f"Could not apply indexes: {e}")
+    transcription_jobs.start()
+    progress_buffer.start()
+    await resource_catalog.start()
+    video_index.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await transcription_jobs.stop()
+    await resource_catalog.stop()
+    await video_index.stop()
+    await tutor_sessions.stop()
+    try:
+        await progress_buffer.stop()
+    except Exception as e:
+        logger.error(f"Could not flush {progress_buffer.stats()['pending']} buffered progress entries: {e}")
     client.close()
+    llm.shutdown()
+    pdf_extractor.shutdown()
+    tracing.shutdown()
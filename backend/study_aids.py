@@ -0,0 +1,77 @@
+"""Typed study-aid payloads and validation of Gemini's JSON output.
+
+Flashcards, key terms and quizzes are requested in Gemini's JSON mode with a
+response schema derived from the models below, then validated here so the
+API returns typed arrays instead of raw model text.
+"""
+import re
+from typing import List
+
+from pydantic import BaseModel, TypeAdapter, ValidationError, model_validator
+
+
+class Flashcard(BaseModel):
+    front: str
+    back: str
+
+
+class KeyTerm(BaseModel):
+    term: str
+    definition: str
+
+
+class QuizQuestion(BaseModel):
+    question: str
+    options: List[str]
+    correct: int
+
+    @model_validator(mode="after")
+    def check_correct_option(self):
+        if not 0 <= self.correct < len(self.options):
+            raise ValueError("correct must index one of the options")
+        return self
+
+
+# Aid types returned as JSON arrays; anything else (summary) stays plain text
+STUDY_AID_SCHEMAS = {
+    "flashcards": list[Flashcard],
+    "keyterms": list[KeyTerm],
+    "quiz": list[QuizQuestion],
+}
+
+_ADAPTERS = {aid_type: TypeAdapter(schema) for aid_type, schema in STUDY_AID_SCHEMAS.items()}
+_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+
+def generation_config(aid_type):
+    """Gemini generation config enforcing the aid's JSON schema, or None."""
+    schema = STUDY_AID_SCHEMAS.get(aid_type)
+    if schema is None:
+        return None
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+def _repair(text):
+    """Strip markdown fences and surrounding prose around a JSON array."""
+    text = _FENCE.sub("", text.strip())
+    start, end = text.find("["), text.rfind("]")
+    return text[start:end + 1] if start != -1 and end > start else text
+
+
+def parse_study_aid(aid_type, text):
+    """Validate ``text`` for ``aid_type``; returns plain dicts.
+
+    Raises ValueError when the output cannot be validated even after repair.
+    """
+    adapter = _ADAPTERS.get(aid_type)
+    if adapter is None:
+        return text
+
+    try:
+        items = adapter.validate_json(text)
+    except ValidationError:
+        try:
+            items = adapter.validate_json(_repair(text))
+        except ValidationError as e:
+            raise ValueError(f"Invalid {aid_type} output: {e.error_count()} validation errors") from None
+    return [item.model_dump() for item in items]
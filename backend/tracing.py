@@ -0,0 +1,374 @@
+"""Lightweight request tracing with OpenTelemetry-compatible export.
+
+A trace starts at an entry point (an HTTP request, a background job) and
+collects nested spans through a context variable, so spans opened in awaited
+calls and in tasks spawned from them attach to the right parent. Finished
+traces are encoded as OTLP/JSON ``ExportTraceServiceRequest`` documents and
+handed to a background thread that appends them to a JSON-lines file and/or
+POSTs them to a collector's ``/v1/traces`` endpoint. Traces slower than the
+configured threshold are also logged as an indented span tree.
+
+Spans are only recorded inside a trace; outside one ``span`` is a no-op, so
+library code can be instrumented unconditionally. MongoDB calls are traced by
+wrapping the Motor database in ``TracedDatabase`` because Motor runs commands
+on executor threads that do not see the request's context.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+INTERNAL = 1
+SERVER = 2
+CLIENT = 3
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+_config = {"service_name": "studybridge-backend", "slow_ms": None}
+_exporter = None
+
+
+def _id(n_bytes):
+    return os.urandom(n_bytes).hex()
+
+
+class _Trace:
+    def __init__(self):
+        self.trace_id = _id(16)
+        self.spans = []
+
+
+class Span:
+    def __init__(self, trace, name, parent_id=None, kind=INTERNAL, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = _id(8)
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        trace.spans.append(self)
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def set_error(self, error):
+        message = f"{type(error).__name__}: {error}" if isinstance(error, BaseException) else str(error)
+        self.status = (STATUS_ERROR, message)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    @property
+    def duration_ms(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+def start_span(name, kind=INTERNAL, **attributes):
+    """Create a child of the current span without activating it; None outside a trace.
+
+    The caller ends it. Use this where the work outlives a ``with`` block, e.g.
+    inside async generators or future callbacks.
+    """
+    parent = _current.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, parent.span_id, kind, attributes)
+
+
+@contextmanager
+def span(name, kind=INTERNAL, **attributes):
+    """Record the enclosed block as a child of the current span."""
+    current = start_span(name, kind, **attributes)
+    if current is None:
+        yield None
+        return
+    token = _current.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.set_error(e)
+        raise
+    finally:
+        current.end()
+        _current.reset(token)
+
+
+def start_trace(name, kind=SERVER, **attributes):
+    """Open a root span and make it current; returns ``(span, token)``.
+
+    Pair with ``end_trace`` once the traced work, including any streamed
+    response body, is finished.
+    """
+    root = Span(_Trace(), name, kind=kind, attributes=attributes)
+    return root, _current.set(root)
+
+
+def detach(token):
+    """Restore the span that was current before ``start_trace``."""
+    _current.reset(token)
+
+
+def spawn(coro):
+    """Start ``coro`` as a task outside the current trace.
+
+    For background work that outlives the request it was started from; wrap
+    its body in ``trace`` to record it as a trace of its own.
+    """
+    return contextvars.Context().run(asyncio.create_task, coro)
+
+
+def end_trace(root, token=None):
+    if token is not None:
+        detach(token)
+    root.end()
+    _finish(root.trace)
+
+
+@contextmanager
+def trace(name, kind=INTERNAL, **attributes):
+    """Run the block as a trace of its own, or as a span if already inside one."""
+    if _current.get() is not None:
+        with span(name, kind, **attributes) as current:
+            yield current
+        return
+    root, token = start_trace(name, kind, **attributes)
+    try:
+        yield root
+    except Exception as e:
+        root.set_error(e)
+        raise
+    finally:
+        end_trace(root, token)
+
+
+def _finish(trace_):
+    root = trace_.spans[0]
+    if _config["slow_ms"] is not None and root.duration_ms >= _config["slow_ms"]:
+        logger.warning(f"Slow trace ({root.duration_ms:.0f} ms), trace {trace_.trace_id}:\n{format_tree(trace_)}")
+    if _exporter is not None:
+        _exporter.submit(trace_)
+
+
+def format_tree(trace_):
+    children = {}
+    for item in trace_.spans:
+        children.setdefault(item.parent_id, []).append(item)
+
+    lines = []
+
+    def walk(item, depth):
+        attributes = " ".join(f"{key}={value}" for key, value in item.attributes.items())
+        status = f" ERROR {item.status[1]}" if item.status and item.status[0] == STATUS_ERROR else ""
+        lines.append(f"{'  ' * depth}{item.name} {item.duration_ms:.1f} ms {attributes}{status}".rstrip())
+        for child in sorted(children.get(item.span_id, []), key=lambda c: c.start_ns):
+            walk(child, depth + 1)
+
+    walk(trace_.spans[0], 0)
+    return "\n".join(lines)
+
+
+def _attribute_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(mapping):
+    return [{"key": key, "value": _attribute_value(value)} for key, value in mapping.items() if value is not None]
+
+
+def to_otlp(trace_):
+    spans = []
+    for item in trace_.spans:
+        encoded = {
+            "traceId": trace_.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": item.kind,
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns or time.time_ns()),
+            "attributes": _attributes(item.attributes),
+            "status": {"code": item.status[0], "message": item.status[1]} if item.status else {"code": STATUS_OK},
+        }
+        if item.parent_id:
+            encoded["parentSpanId"] = item.parent_id
+        spans.append(encoded)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _attributes({"service.name": _config["service_name"]})},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+        }]
+    }
+
+
+class _Exporter:
+    """Encodes and writes finished traces from a daemon thread, off the request path."""
+
+    def __init__(self, export_file=None, export_url=None, max_queue=1000):
+        self.export_file = export_file
+        self.export_url = export_url
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._session = None
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, trace_):
+        try:
+            self._queue.put_nowait(trace_)
+        except queue.Full:
+            logger.warning("Trace export queue full; dropping trace")
+
+    def _run(self):
+        while True:
+            trace_ = self._queue.get()
+            if trace_ is None:
+                return
+            try:
+                self._export(to_otlp(trace_))
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+
+    def _export(self, payload):
+        if self.export_file:
+            with open(self.export_file, "a", encoding="utf-8") as out:
+                out.write(json.dumps(payload, separators=(",", ":")) + "\n")
+        if self.export_url:
+            if self._session is None:
+                self._session = requests.Session()
+            self._session.post(self.export_url, json=payload, timeout=5).raise_for_status()
+
+    def shutdown(self, timeout=5):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+def configure(service_name=None, export_file=None, export_url=None, slow_ms=None):
+    global _exporter
+    if service_name:
+        _config["service_name"] = service_name
+    _config["slow_ms"] = slow_ms
+    if export_file or export_url:
+        _exporter = _Exporter(export_file, export_url)
+
+
+def shutdown():
+    global _exporter
+    if _exporter is not None:
+        _exporter.shutdown()
+        _exporter = None
+
+
+class _TracedCursor:
+    def __init__(self, cursor, collection, operation):
+        self._cursor = cursor
+        self._collection = collection
+        self._operation = operation
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if result is self._cursor:
+                # Chained sort()/limit()/skip()
+                return self
+            if hasattr(result, "__await__"):
+                # to_list() runs the query itself; other awaitables are named after the method
+                operation = self._operation if name == "to_list" else f"{self._operation}.{name}"
+                return _traced_await(result, self._collection, operation)
+            return result
+
+        return call
+
+    async def __aiter__(self):
+        current = start_span(f"mongo {self._operation}", CLIENT,
+                             **{"db.system": "mongodb", "db.mongodb.collection": self._collection})
+        count = 0
+        try:
+            async for document in self._cursor:
+                count += 1
+                yield document
+        finally:
+            if current is not None:
+                current.set_attributes(**{"db.documents": count})
+                current.end()
+
+
+async def _traced_await(awaitable, collection, operation):
+    current = start_span(f"mongo {operation}", CLIENT,
+                         **{"db.system": "mongodb", "db.operation": operation, "db.mongodb.collection": collection})
+    try:
+        return await awaitable
+    except Exception as e:
+        if current is not None:
+            current.set_error(e)
+        raise
+    finally:
+        if current is not None:
+            current.end()
+
+
+class TracedCollection:
+    """Motor collection proxy recording a span per awaited operation."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._name = collection.name
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "__await__"):
+                return _traced_await(result, self._name, name)
+            if hasattr(result, "to_list"):
+                return _TracedCursor(result, self._name, name)
+            return result
+
+        return call
+
+
+class TracedDatabase:
+    """Motor database proxy handing out ``TracedCollection`` objects."""
+
+    def __init__(self, database):
+        self._database = database
+
+    def __getitem__(self, name):
+        return TracedCollection(self._database[name])
+
+    def __getattr__(self, name):
+        attr = getattr(self._database, name)
+        if name == "command":
+            def command(*args, **kwargs):
+                return _traced_await(attr(*args, **kwargs), "$cmd", f"command {args[0] if args else ''}".strip())
+            return command
+        if hasattr(attr, "find_one") and not name.startswith("_"):
+            # Collections are callable objects too, so check for the API
+            return TracedCollection(attr)
+        return attr
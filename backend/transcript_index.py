@@ -0,0 +1,69 @@
+"""Time-indexed transcript segments for player caption sync.
+
+Segments are kept sorted by start offset with a parallel list of starts, so
+finding the caption at a playback time, or every caption in a window, is a
+binary search instead of a scan. WebVTT and SRT exports are rendered from
+the same index.
+"""
+from bisect import bisect_left, bisect_right
+
+# Caption length used for a final segment with no known end
+DEFAULT_LAST_SEGMENT_SECONDS = 5.0
+
+
+def _format_time(seconds, decimal_sep):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal_sep}{millis:03d}"
+
+
+class SegmentIndex:
+    def __init__(self, segments):
+        self.segments = sorted(
+            (s for s in segments if s.get("start") is not None), key=lambda s: s["start"]
+        )
+        self.starts = [s["start"] for s in self.segments]
+
+    def __len__(self):
+        return len(self.segments)
+
+    def _end(self, i):
+        end = self.segments[i].get("end")
+        if end is not None:
+            return end
+        if i + 1 < len(self.segments):
+            return self.starts[i + 1]
+        return self.starts[i] + DEFAULT_LAST_SEGMENT_SECONDS
+
+    def at(self, t):
+        """Return (position, segment) playing at time ``t``, or (None, None)."""
+        i = bisect_right(self.starts, t) - 1
+        if i < 0 or t >= self._end(i):
+            return None, None
+        return i, self.segments[i]
+
+    def between(self, start, end):
+        """Segments overlapping the window [start, end)."""
+        first = max(bisect_right(self.starts, start) - 1, 0)
+        if first < len(self.segments) and self._end(first) <= start:
+            first += 1
+        last = bisect_left(self.starts, end)
+        return self.segments[first:last]
+
+    def _cues(self):
+        for i, segment in enumerate(self.segments):
+            yield i + 1, segment["start"], self._end(i), segment["text"]
+
+    def to_webvtt(self):
+        lines = ["WEBVTT", ""]
+        for n, start, end, text in self._cues():
+            lines += [str(n), f"{_format_time(start, '.')} --> {_format_time(end, '.')}", text, ""]
+        return "\n".join(lines)
+
+    def to_srt(self):
+        lines = []
+        for n, start, end, text in self._cues():
+            lines += [str(n), f"{_format_time(start, ',')} --> {_format_time(end, ',')}", text, ""]
+        return "\n".join(lines)
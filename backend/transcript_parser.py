@@ -0,0 +1,85 @@
+"""Parse Gemini's timestamped transcripts into numeric segments.
+
+Lines look like ``[MM:SS] text`` or ``[HH:MM:SS] text``. Each segment gets a
+``start`` offset in seconds and an ``end`` equal to the next segment's start
+(or the video duration for the last one). Lines without a timestamp are
+treated as continuations of the previous segment rather than dropped.
+``TranscriptParser`` accepts text in arbitrary pieces so it can consume a
+streaming response as it arrives.
+"""
+import re
+
+# The leading field is unbounded: past 99 minutes Gemini writes [100:05]
+_TIMESTAMP_LINE = re.compile(r'\[(?:(\d+):)?(\d+):(\d{2})(?:\.\d+)?\]\s*(.*)')
+
+
+class TranscriptParser:
+    """Incremental parser; ``feed`` returns segments whose end is now known."""
+
+    def __init__(self, duration=None):
+        self.duration = duration
+        self.segments = []
+        self._buffer = ""
+        self._current = None
+
+    def feed(self, text):
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        completed = []
+        for line in lines:
+            segment = self._parse_line(line)
+            if segment is not None:
+                completed.append(segment)
+        return completed
+
+    def close(self):
+        """Flush buffered text and return the full segment list."""
+        if self._buffer:
+            self._parse_line(self._buffer)
+            self._buffer = ""
+        if self._current is not None:
+            self._current["end"] = self.duration
+            self._finish()
+        return self.segments
+
+    def _finish(self):
+        if self._current["text"]:
+            self.segments.append(self._current)
+        self._current = None
+
+    def _parse_line(self, line):
+        """Consume one line; returns the previous segment if it just ended."""
+        line = line.strip()
+        if not line:
+            return None
+
+        match = _TIMESTAMP_LINE.match(line)
+        if match is None:
+            # Continuation of the previous segment
+            if self._current is not None:
+                separator = " " if self._current["text"] else ""
+                self._current["text"] += separator + line
+            return None
+
+        hours, minutes, seconds, text = match.groups()
+        start = int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+        previous = self._current
+        if previous is not None:
+            previous["end"] = float(start)
+            self._finish()
+
+        self._current = {
+            "timestamp": line[1:line.index("]")],
+            "start": float(start),
+            "end": None,
+            "text": text.strip(),
+        }
+        if previous is not None and previous["text"]:
+            return previous
+        return None
+
+
+def parse_transcript(text, duration=None):
+    parser = TranscriptParser(duration)
+    parser.feed(text)
+    return parser.close()
@@ -0,0 +1,40 @@
+"""Persistent transcripts keyed by video content.
+
+A transcript is stored under the SHA-256 of the uploaded bytes and/or the
+YouTube video id, so the same lecture requested again by a class is answered
+from MongoDB instead of another Gemini video transcription.
+"""
+import logging
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptStore:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def find(self, sha256=None, youtube_id=None):
+        """Return {"transcript", "segments"} for either key, or None."""
+        keys = [{"sha256": sha256}] if sha256 else []
+        if youtube_id:
+            keys.append({"youtube_id": youtube_id})
+        if not keys:
+            return None
+        return await self.collection.find_one(
+            {"$or": keys}, {"_id": 0, "transcript": 1, "segments": 1}
+        )
+
+    async def save(self, result, sha256=None, youtube_id=None):
+        if not sha256 and not youtube_id:
+            return
+        keys = {k: v for k, v in (("sha256", sha256), ("youtube_id", youtube_id)) if v}
+        await self.collection.update_one(
+            keys,
+            {"$set": {
+                "transcript": result["transcript"],
+                "segments": result["segments"],
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }},
+            upsert=True,
+        )
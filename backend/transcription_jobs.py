@@ -0,0 +1,198 @@
+"""MongoDB-backed background job queue for video transcription.
+
+Submitting a job only inserts a document; worker tasks claim queued jobs with
+an atomic ``find_one_and_update`` so several server processes can share one
+queue. Running jobs hold a lease that is renewed while they work; if a
+process dies its jobs are picked up again once the lease expires. Every claim
+gets its own lease token and a worker's writes are scoped to it, so a worker
+whose lease lapsed cannot overwrite the job once another worker re-claimed it.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+class TranscriptionJobs:
+    """Queue of transcription jobs processed by a pool of asyncio workers.
+
+    ``handler(job, report)`` does the work and returns the job result;
+    ``report(stage)`` records progress such as ``"uploading"``.
+    """
+
+    def __init__(self, collection, handler, workers=2, poll_interval=2.0,
+                 lease_seconds=300, max_attempts=3):
+        self.collection = collection
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.worker_id = uuid.uuid4().hex[:12]
+        self._tasks = []
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+
+    async def submit(self, **fields):
+        now = _now()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "status": QUEUED,
+            "stage": None,
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            **fields,
+        }
+        await self.collection.insert_one(job)
+        job.pop("_id", None)
+        self._wakeup.set()
+        return job
+
+    async def find_active(self, **query):
+        """Return a queued or running job matching ``query`` that can still finish."""
+        return await self.collection.find_one(
+            {
+                **query,
+                "$or": [
+                    {"status": QUEUED},
+                    {"status": RUNNING, "attempts": {"$lt": self.max_attempts}},
+                    {"status": RUNNING, "lease_until": {"$gte": _now()}},
+                ],
+            },
+            {"_id": 0},
+            sort=[("created_at", 1)],
+        )
+
+    async def get(self, job_id):
+        job = await self.collection.find_one({"job_id": job_id}, {"_id": 0})
+        if (job and job["status"] == RUNNING and job["attempts"] >= self.max_attempts
+                and job["lease_until"].replace(tzinfo=timezone.utc) < _now()):
+            # Abandoned on its final attempt; nobody will claim it again
+            await self.collection.update_one(
+                {"job_id": job_id, "status": RUNNING},
+                {"$set": {"status": FAILED, "error": "Worker stopped responding", "updated_at": _now()}},
+            )
+            job.update(status=FAILED, error="Worker stopped responding")
+        return job
+
+    def start(self):
+        self._stopping = False
+        for _ in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._run_worker()))
+
+    async def stop(self):
+        # wait_for() can swallow a cancel that races with the wakeup event
+        # (before Python 3.12), so idle workers also check the flag
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _claim(self):
+        now = _now()
+        job = await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": QUEUED},
+                    # Lease expired: the worker that held it is gone
+                    {"status": RUNNING, "lease_until": {"$lt": now}},
+                ],
+                "attempts": {"$lt": self.max_attempts},
+            },
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "worker": self.worker_id,
+                    "lease_token": uuid.uuid4().hex,
+                    "lease_until": now + self.lease,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is not None:
+            job.pop("_id", None)
+        return job
+
+    async def _update(self, job, **fields):
+        """Write ``fields`` while ``job``'s claim still holds the lease; False if it was lost."""
+        fields["updated_at"] = _now()
+        result = await self.collection.update_one(
+            {"job_id": job["job_id"], "lease_token": job["lease_token"]}, {"$set": fields}
+        )
+        return result.matched_count > 0
+
+    async def _renew_lease(self, job):
+        interval = self.lease.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await self._update(job, lease_until=_now() + self.lease):
+                    logger.warning(f"Lost the lease on transcription job {job['job_id']}")
+                    return
+            except Exception as e:
+                # Retried on the next tick; the lease outlasts two missed renewals
+                logger.warning(f"Could not renew lease on transcription job {job['job_id']}: {e}")
+
+    async def _run_worker(self):
+        while not self._stopping:
+            try:
+                job = await self._claim()
+                if job is not None:
+                    await self._process(job)
+                    continue
+            except Exception as e:
+                logger.warning(f"Transcription worker error: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _process(self, job):
+        job_id = job["job_id"]
+
+        async def report(stage):
+            try:
+                await self._update(job, stage=stage)
+            except Exception as e:
+                logger.warning(f"Could not record stage of transcription job {job_id}: {e}")
+
+        renewer = asyncio.create_task(self._renew_lease(job))
+        try:
+            try:
+                with tracing.trace("transcription job", job_id=job_id, attempt=job["attempts"]):
+                    result = await self.handler(job, report)
+            except Exception as e:
+                logger.error(f"Transcription job {job_id} failed: {e}")
+                written = await self._update(job, status=FAILED, error=str(e), lease_until=None)
+            else:
+                written = await self._update(job, status=COMPLETED, stage=None, result=result, lease_until=None)
+            if not written:
+                logger.warning(f"Transcription job {job_id} was re-claimed by another worker; discarding this result")
+        finally:
+            renewer.cancel()
@@ -0,0 +1,122 @@
+"""Server-side memory for AI tutor conversations.
+
+Each session keeps the most recent turns verbatim plus a running summary of
+everything older. Once the verbatim window overflows by a full batch, the
+oldest turns are folded into the summary by the injected ``summarize``
+callable and pulled from the document, so the prompt sent to Gemini stays
+bounded however long the conversation runs. Compaction runs as a background
+task so a reply never waits on the summarization call. Token usage is
+accumulated per session with ``$inc``.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+STUDENT = "student"
+TUTOR = "tutor"
+
+
+class TutorSessions:
+    """Tutor sessions stored in MongoDB.
+
+    ``summarize(summary, turns)`` is an async callable returning
+    ``(new_summary, prompt_tokens, response_tokens)``.
+    """
+
+    def __init__(self, collection, summarize, window_turns=12, compact_turns=8, ttl_seconds=30 * 24 * 3600):
+        self.collection = collection
+        self.summarize = summarize
+        self.window_turns = window_turns
+        self.compact_turns = compact_turns
+        self.ttl_seconds = ttl_seconds
+        self._locks = {}
+        self._tasks = set()
+
+    async def create(self, user_id=None, student_level=None):
+        now = datetime.now(timezone.utc)
+        session = {
+            "session_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "student_level": student_level,
+            "summary": "",
+            "turns": [],
+            "turn_count": 0,
+            "tokens": {"prompt": 0, "response": 0, "summary": 0},
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.collection.insert_one(dict(session))
+        return session
+
+    async def get(self, session_id):
+        return await self.collection.find_one({"session_id": session_id}, {"_id": 0})
+
+    async def delete(self, session_id):
+        result = await self.collection.delete_one({"session_id": session_id})
+        return result.deleted_count > 0
+
+    async def record(self, session_id, message, reply, prompt_tokens, response_tokens):
+        """Append one exchange, charge its tokens and schedule compaction if the window overflowed."""
+        now = datetime.now(timezone.utc)
+        turns = [
+            {"id": uuid.uuid4().hex, "role": STUDENT, "text": message, "at": now},
+            {"id": uuid.uuid4().hex, "role": TUTOR, "text": reply, "at": now},
+        ]
+        await self.collection.update_one(
+            {"session_id": session_id},
+            {
+                "$push": {"turns": {"$each": turns}},
+                "$inc": {
+                    "turn_count": 1,
+                    "tokens.prompt": prompt_tokens,
+                    "tokens.response": response_tokens,
+                },
+                "$set": {"updated_at": now},
+            },
+        )
+        if session_id not in self._locks:
+            task = tracing.spawn(self._maybe_compact(session_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def stop(self):
+        """Cancel pending compactions; their turns are compacted after the next exchange."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _maybe_compact(self, session_id):
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        if lock.locked():
+            # Another task is already compacting this session
+            return
+        async with lock:
+            try:
+                session = await self.get(session_id)
+                if not session:
+                    return
+                turns = session["turns"]
+                if len(turns) < self.window_turns + self.compact_turns:
+                    return
+
+                oldest = turns[:len(turns) - self.window_turns]
+                with tracing.trace("tutor session compaction", session_id=session_id, turns=len(oldest)):
+                    summary, prompt_tokens, response_tokens = await self.summarize(session["summary"], oldest)
+                    # Pull by id so turns appended meanwhile are kept
+                    await self.collection.update_one(
+                        {"session_id": session_id},
+                        {
+                            "$set": {"summary": summary},
+                            "$pull": {"turns": {"id": {"$in": [turn["id"] for turn in oldest]}}},
+                            "$inc": {"tokens.summary": prompt_tokens + response_tokens},
+                        },
+                    )
+            except Exception as e:
+                logger.warning(f"Compacting tutor session {session_id} failed: {e}")
+            finally:
+                self._locks.pop(session_id, None)
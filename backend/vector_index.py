@@ -0,0 +1,111 @@
+"""Embedding-based retrieval over stored documents and transcripts.
+
+A source (document or transcript) is split into small chunks, embedded in
+batches, and persisted to MongoDB so the work happens once per source. For
+queries the vectors are loaded into a normalized NumPy matrix, kept in an
+LRU, and the top-k chunks are found with one matrix-vector product.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+import numpy as np
+from cachetools import LRUCache
+from pymongo.errors import BulkWriteError
+
+from chunking import split_text
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """Per-source chunk embeddings with cosine top-k search.
+
+    ``embed(texts, task_type)`` is an async callable returning one vector
+    per text, e.g. ``LLMClient.embed``.
+    """
+
+    def __init__(self, collection, embed, chunk_tokens=300, batch_size=100, max_sources=64):
+        self.collection = collection
+        self.embed = embed
+        self.chunk_tokens = chunk_tokens
+        self.batch_size = batch_size
+        self._sources = LRUCache(maxsize=max_sources)
+        self._locks = {}
+
+    async def _build(self, source_id, text):
+        chunks = split_text(text, self.chunk_tokens)
+        batches = [chunks[i:i + self.batch_size] for i in range(0, len(chunks), self.batch_size)]
+        results = await asyncio.gather(*(self.embed(batch, "retrieval_document") for batch in batches))
+        vectors = [vector for batch in results for vector in batch]
+
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            await self.collection.insert_many(
+                [
+                    {"source_id": source_id, "chunk": i, "text": chunk, "vector": vector, "created_at": now}
+                    for i, (chunk, vector) in enumerate(zip(chunks, vectors))
+                ],
+                ordered=False,
+            )
+        except BulkWriteError as e:
+            # Another worker embedded the same source first; its chunks are equivalent
+            details = e.details or {}
+            if details.get("writeConcernErrors") or any(
+                error.get("code") != 11000 for error in details.get("writeErrors", [])
+            ):
+                raise
+            logger.info(f"Embeddings for {source_id} were stored concurrently")
+        return chunks, vectors
+
+    async def _load(self, source_id, load_text):
+        """Return (normalized matrix, chunk texts), embedding the source if needed."""
+        cached = self._sources.get(source_id)
+        if cached is not None:
+            return cached
+
+        lock = self._locks.setdefault(source_id, asyncio.Lock())
+        async with lock:
+            try:
+                cached = self._sources.get(source_id)
+                if cached is not None:
+                    return cached
+
+                docs = await self.collection.find(
+                    {"source_id": source_id}, {"_id": 0, "text": 1, "vector": 1}
+                ).sort("chunk", 1).to_list(length=None)
+                if docs:
+                    chunks = [doc["text"] for doc in docs]
+                    vectors = [doc["vector"] for doc in docs]
+                else:
+                    text = await load_text()
+                    if not text or not text.strip():
+                        return None
+                    logger.info(f"Embedding source {source_id}")
+                    chunks, vectors = await self._build(source_id, text)
+
+                matrix = np.asarray(vectors, dtype=np.float32)
+                matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+                self._sources[source_id] = (matrix, chunks)
+                return matrix, chunks
+            finally:
+                # Also on failure, or the lock would outlive the source forever
+                self._locks.pop(source_id, None)
+
+    async def search(self, sources, query, k=4):
+        """Top-k chunks across ``sources``, a mapping of source_id -> async text loader."""
+        loaded = await asyncio.gather(*(self._load(sid, loader) for sid, loader in sources.items()))
+        loaded = [item for item in loaded if item is not None]
+        if not loaded:
+            return []
+
+        query_vector = np.asarray((await self.embed([query], "retrieval_query"))[0], dtype=np.float32)
+        query_vector /= max(np.linalg.norm(query_vector), 1e-12)
+
+        matrix = np.vstack([m for m, _ in loaded]) if len(loaded) > 1 else loaded[0][0]
+        chunks = [chunk for _, source_chunks in loaded for chunk in source_chunks]
+        scores = matrix @ query_vector
+        k = min(k, len(chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [{"text": chunks[i], "score": float(scores[i])} for i in top]
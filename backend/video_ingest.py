@@ -0,0 +1,201 @@
+"""Video ingest without blocking the event loop.
+
+Uploads are parsed straight off the request stream with python-multipart
+rather than through Starlette's form parser, which spools the whole body to a
+temporary file before the handler runs. The file part is copied to disk in
+fixed-size chunks on a worker thread while a SHA-256 of the bytes is
+computed, and the copy is aborted as soon as the configured ceiling is
+exceeded. YouTube downloads run yt_dlp on a thread and forward its progress
+hooks to the event loop.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+
+import yt_dlp
+from python_multipart.multipart import FormParserError, MultipartParser, parse_options_header
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+_YOUTUBE_ID = re.compile(
+    r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/)|youtu\.be/)([A-Za-z0-9_-]{11})'
+)
+
+
+# Allowance for multipart boundaries and part headers over the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured byte ceiling."""
+
+
+class InvalidUpload(Exception):
+    """Raised when a request body is not a usable multipart file upload."""
+
+
+class StreamedUpload:
+    """The file part ``field_name`` of a multipart/form-data request, read as it arrives.
+
+    ``open()`` consumes the body up to the file's part headers and fills in
+    ``filename`` and ``content_type``; ``read(size)`` then returns the file's
+    bytes like ``UploadFile.read``. Other parts are skipped without buffering.
+    """
+
+    def __init__(self, request, field_name="file"):
+        content_type, params = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or not params.get(b"boundary"):
+            raise InvalidUpload("Expected a multipart/form-data body")
+        self.field_name = field_name
+        self.filename = None
+        self.content_type = None
+        self._stream = request.stream().__aiter__()
+        self._events = []
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        self._buffer = bytearray()
+        self._finished = False
+        self._eof = False
+        self._parser = MultipartParser(params[b"boundary"], {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": lambda data, start, end: self._add_header_bytes("_header_field", data[start:end]),
+            "on_header_value": lambda data, start, end: self._add_header_bytes("_header_value", data[start:end]),
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": lambda: self._events.append(("headers", self._headers)),
+            "on_part_data": lambda data, start, end: self._events.append(("data", data[start:end])),
+            "on_part_end": lambda: self._events.append(("end", None)),
+        })
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _add_header_bytes(self, name, data):
+        setattr(self, name, getattr(self, name) + data)
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    async def _feed(self):
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            chunk = None
+        try:
+            if chunk is None:
+                self._parser.finalize()
+            elif chunk:
+                self._parser.write(chunk)
+        except FormParserError as e:
+            raise InvalidUpload(f"Malformed multipart body: {e}") from e
+
+        for kind, payload in self._events:
+            if kind == "headers":
+                _, disposition = parse_options_header(payload.get(b"content-disposition", b""))
+                name = disposition.get(b"name", b"").decode("utf-8", "replace")
+                if name == self.field_name and b"filename" in disposition and self.filename is None:
+                    self.filename = disposition[b"filename"].decode("utf-8", "replace")
+                    self.content_type = payload.get(b"content-type", b"").decode("latin-1") or None
+                    self._in_file = True
+            elif kind == "data" and self._in_file:
+                self._buffer.extend(payload)
+            elif kind == "end" and self._in_file:
+                self._in_file = False
+                self._finished = True
+        self._events.clear()
+
+    async def open(self):
+        while self.filename is None:
+            if self._eof:
+                raise InvalidUpload(f"No file in form field '{self.field_name}'")
+            await self._feed()
+        return self
+
+    async def read(self, size=-1):
+        while not self._finished and (size < 0 or len(self._buffer) < size):
+            if self._eof:
+                raise InvalidUpload("Upload ended before the file was complete")
+            await self._feed()
+        if size < 0:
+            size = len(self._buffer)
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
+
+
+def youtube_video_id(url):
+    """Extract the 11-character video id from a YouTube URL, if recognisable."""
+    match = _YOUTUBE_ID.search(url)
+    return match.group(1) if match else None
+
+
+async def save_upload(upload, path, max_bytes, chunk_size=CHUNK_SIZE):
+    """Stream an upload (anything with an async ``read(size)``) to ``path``.
+
+    Returns (size, sha256 hex digest). The partially written file is removed
+    if the copy fails or is too large.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    out = await asyncio.to_thread(open, path, "wb")
+
+    def write(chunk):
+        digest.update(chunk)
+        out.write(chunk)
+
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds the {max_bytes // (1024 * 1024)}MB limit")
+            await asyncio.to_thread(write, chunk)
+    except BaseException:
+        await asyncio.to_thread(out.close)
+        path.unlink(missing_ok=True)
+        raise
+
+    await asyncio.to_thread(out.close)
+    return size, digest.hexdigest()
+
+
+async def download_youtube(url, output_path, max_bytes, on_progress=None):
+    """Download a YouTube video with yt_dlp on a worker thread.
+
+    ``on_progress(status)`` is called on the event loop with yt_dlp's
+    progress dictionaries. Returns the info dict from ``extract_info``.
+    """
+    loop = asyncio.get_running_loop()
+
+    def hook(status):
+        if on_progress is not None:
+            loop.call_soon_threadsafe(on_progress, status)
+
+    ydl_opts = {
+        'format': 'best[ext=mp4]/best',  # Simplified - get best single file format
+        'outtmpl': str(output_path),
+        'quiet': True,
+        'no_warnings': False,
+        'max_filesize': max_bytes,
+        'merge_output_format': 'mp4',
+        'prefer_ffmpeg': True,
+        'progress_hooks': [hook],
+    }
+
+    def run():
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            return ydl.extract_info(url, download=True)
+
+    with tracing.span("yt_dlp download", url=url):
+        return await loop.run_in_executor(None, run)
@@ -0,0 +1,349 @@
+"""Video index and HTTP range serving for the player.
+
+Every stored video is recorded in MongoDB and cached in memory as
+id -> (path, size, mime type, mtime), so serving a request never scans the
+video directory. Cached entries are re-stat'ed every ``revalidate_seconds``
+and evicted once their file is gone. Responses support single-range ``Range`` requests (206),
+``ETag``/``Last-Modified`` validators and conditional GETs, which is what
+the browser's video element relies on while seeking.
+
+Videos live in a managed directory rather than the OS temp dir, and a
+background sweep enforces a retention policy on it: videos unused for
+``max_age_seconds`` are deleted, then the least recently used ones until the
+directory fits in ``max_bytes``. Use is tracked in a ``last_accessed`` field
+instead of the file mtime, which feeds the ETag.
+"""
+import asyncio
+import logging
+import mimetypes
+import re
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional
+
+import anyio
+from starlette.responses import Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+_RANGE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+
+@dataclass
+class VideoEntry:
+    video_id: str
+    path: Path
+    size: int
+    mime_type: str
+    mtime: float
+    sha256: Optional[str] = None
+    youtube_id: Optional[str] = None
+    duration: Optional[float] = None
+    filename: Optional[str] = None
+    # time.monotonic() of the stat the entry reflects
+    checked_at: float = 0.0
+
+    @property
+    def etag(self):
+        return f'"{self.video_id}-{self.size:x}-{int(self.mtime):x}"'
+
+    @property
+    def last_modified(self):
+        return formatdate(self.mtime, usegmt=True)
+
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        return value.timestamp() if value.tzinfo else value.replace(tzinfo=timezone.utc).timestamp()
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class VideoIndex:
+    """In-memory cache of the ``videos`` collection keyed by video id."""
+
+    def __init__(self, collection, video_dir, max_bytes=None, max_age_seconds=None,
+                 sweep_interval=3600, touch_interval=3600, revalidate_seconds=30):
+        self.collection = collection
+        self.video_dir = Path(video_dir)
+        self.video_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.sweep_interval = sweep_interval
+        # Also the grace period: recently used videos and young files are never swept
+        self.touch_interval = touch_interval
+        self.revalidate_seconds = revalidate_seconds
+        self._entries = {}
+        self._touched = {}
+        self._task = None
+
+    def _entry_for(self, record):
+        path = Path(record["path"])
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        mime_type = (
+            record.get("content_type")
+            or mimetypes.guess_type(path.name)[0]
+            or "application/octet-stream"
+        )
+        return VideoEntry(
+            record["video_id"], path, stat.st_size, mime_type, stat.st_mtime,
+            sha256=record.get("sha256"), youtube_id=record.get("youtube_id"),
+            duration=record.get("duration") or None, filename=record.get("filename"),
+            checked_at=time.monotonic(),
+        )
+
+    @staticmethod
+    def _revalidate(entry):
+        """Re-stat a cached entry; None if its file is gone."""
+        try:
+            stat = entry.path.stat()
+        except FileNotFoundError:
+            return None
+        return replace(entry, size=stat.st_size, mtime=stat.st_mtime, checked_at=time.monotonic())
+
+    async def register(self, record):
+        """Persist a new video record and cache its entry."""
+        record = {"last_accessed": datetime.now(timezone.utc).isoformat(), **record}
+        await self.collection.insert_one(record)
+        entry = self._entry_for(record)
+        if entry is not None:
+            self._entries[entry.video_id] = entry
+            self._touched[entry.video_id] = time.time()
+        return entry
+
+    async def _touch(self, video_id):
+        """Record a use of ``video_id``, writing at most once per ``touch_interval``."""
+        now = time.time()
+        last = self._touched.get(video_id)
+        if last is not None and now - last < self.touch_interval:
+            return
+        self._touched[video_id] = now
+        try:
+            await self.collection.update_one(
+                {"video_id": video_id},
+                {"$set": {"last_accessed": datetime.now(timezone.utc).isoformat()}},
+            )
+        except Exception as e:
+            logger.warning(f"Could not record use of video {video_id}: {e}")
+
+    async def find_existing(self, **query):
+        """Return an earlier video record matching ``query`` that is still on disk."""
+        async for record in self.collection.find(query, {"_id": 0}):
+            if Path(record["path"]).exists():
+                return record
+        return None
+
+    async def get(self, video_id):
+        """Look up a video, falling back to MongoDB and then the directory."""
+        entry = self._entries.get(video_id)
+        if entry is not None and time.monotonic() - entry.checked_at > self.revalidate_seconds:
+            entry = await anyio.to_thread.run_sync(self._revalidate, entry)
+            if entry is None:
+                logger.info(f"Video {video_id} disappeared from disk; evicting it")
+                self.evict(video_id)
+            else:
+                self._entries[video_id] = entry
+        if entry is not None:
+            await self._touch(video_id)
+            return entry
+
+        record = await self.collection.find_one({"video_id": video_id}, {"_id": 0})
+        if record is None:
+            # Files written before the index existed
+            matches = await anyio.to_thread.run_sync(lambda: list(self.video_dir.glob(f"{video_id}.*")))
+            if not matches:
+                return None
+            record = {"video_id": video_id, "path": str(matches[0])}
+
+        entry = await anyio.to_thread.run_sync(self._entry_for, record)
+        if entry is not None:
+            self._entries[video_id] = entry
+            await self._touch(video_id)
+        return entry
+
+    def evict(self, video_id):
+        self._entries.pop(video_id, None)
+        self._touched.pop(video_id, None)
+
+    async def delete(self, record):
+        """Remove a video's file, record and cache entry."""
+        await anyio.to_thread.run_sync(lambda: Path(record["path"]).unlink(missing_ok=True))
+        await self.collection.delete_one({"video_id": record["video_id"]})
+        self.evict(record["video_id"])
+
+    async def sweep(self):
+        """Apply the retention policy once; returns the number of videos deleted."""
+        now = time.time()
+        records = await self.collection.find(
+            {}, {"_id": 0, "video_id": 1, "path": 1, "size": 1, "created_at": 1, "last_accessed": 1}
+        ).to_list(length=None)
+
+        def last_used(record):
+            return max(
+                _parse_time(record.get("last_accessed")) or _parse_time(record.get("created_at")) or 0,
+                self._touched.get(record["video_id"], 0),
+            )
+
+        expired = []
+        kept = []
+        for record in sorted(records, key=last_used):
+            idle = now - last_used(record)
+            if self.max_age_seconds is not None and idle > max(self.max_age_seconds, self.touch_interval):
+                expired.append(record)
+            else:
+                kept.append(record)
+
+        if self.max_bytes is not None:
+            total = sum(record.get("size") or 0 for record in kept)
+            for record in list(kept):
+                if total <= self.max_bytes:
+                    break
+                if now - last_used(record) < self.touch_interval:
+                    # Everything after this one was used more recently still
+                    break
+                expired.append(record)
+                kept.remove(record)
+                total -= record.get("size") or 0
+
+        for record in expired:
+            try:
+                await self.delete(record)
+            except Exception as e:
+                logger.warning(f"Could not delete video {record['video_id']}: {e}")
+        deleted = len(expired)
+
+        # Files with no record: failed or abandoned downloads, pre-index uploads
+        known = {Path(record["path"]).name for record in kept}
+
+        def remove_orphans():
+            removed = 0
+            for path in self.video_dir.iterdir():
+                try:
+                    if path.name not in known and path.is_file() and now - path.stat().st_mtime > self.touch_interval:
+                        path.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+            return removed
+
+        deleted += await anyio.to_thread.run_sync(remove_orphans)
+        if deleted:
+            logger.info(f"Video retention removed {deleted} files from {self.video_dir}")
+        return deleted
+
+    def start(self):
+        if self.max_bytes is None and self.max_age_seconds is None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Video retention sweep failed: {e}")
+            await asyncio.sleep(self.sweep_interval)
+
+
+def _not_modified(request, entry):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return entry.etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*"
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(entry.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _parse_range(header, size):
+    """Return (start, end) inclusive for a single byte range, None to ignore, or raise ValueError."""
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None  # multi-range or unknown unit: serve the whole file
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+async def _read_range(path, start, end):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def video_response(request, entry):
+    """Build a 200, 206, 304 or 416 response for ``entry``."""
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": entry.last_modified,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=3600",
+    }
+
+    if _not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range and if_range not in (entry.etag, entry.last_modified):
+        range_header = None  # validator changed: send the whole, current file
+
+    byte_range = None
+    if range_header:
+        try:
+            byte_range = _parse_range(range_header, entry.size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{entry.size}"
+            return Response(status_code=416, headers=headers)
+
+    status_code = 200
+    start, end = 0, entry.size - 1
+    if byte_range is not None:
+        status_code = 206
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _read_range(entry.path, start, end),
+        status_code=status_code,
+        media_type=entry.mime_type,
+        headers=headers,
+    )
@@ -0,0 +1,96 @@
+"""Write-behind buffering for high-volume inserts.
+
+Callers append documents to an in-memory buffer and return immediately; a
+background task writes them with ``insert_many(ordered=False)`` once a batch
+fills up or the flush interval passes, turning thousands of single-document
+round trips into a handful of bulk writes. When the buffer holds
+``max_pending`` documents, ``add`` waits for the next flush instead of
+growing without bound. ``stop`` flushes whatever is left on shutdown.
+"""
+import asyncio
+import logging
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    def __init__(self, collection, batch_size=500, flush_interval=1.0, max_pending=10000):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = []
+        self._flush_lock = asyncio.Lock()
+        self._batch_ready = asyncio.Event()
+        self._has_room = asyncio.Event()
+        self._has_room.set()
+        self._task = None
+        self._stopping = False
+        self.written = 0
+        self.failed = 0
+
+    async def add(self, docs):
+        """Queue documents for insertion, waiting while the buffer is full."""
+        docs = list(docs)
+        while docs:
+            while len(self._pending) >= self.max_pending:
+                self._has_room.clear()
+                self._batch_ready.set()
+                await self._has_room.wait()
+            room = self.max_pending - len(self._pending)
+            self._pending.extend(docs[:room])
+            docs = docs[room:]
+            if len(self._pending) >= self.batch_size:
+                self._batch_ready.set()
+
+    def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            # wait_for() can swallow a cancel that races with the event firing
+            # (before Python 3.12), so the loop also checks the flag
+            self._stopping = True
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Write-behind flush failed: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                try:
+                    result = await self.collection.insert_many(batch, ordered=False)
+                    self.written += len(result.inserted_ids)
+                except BulkWriteError as e:
+                    # Unordered: everything but the reported documents was written
+                    failures = len(e.details.get("writeErrors", []))
+                    self.written += len(batch) - failures
+                    self.failed += failures
+                    logger.warning(f"Write-behind dropped {failures} documents: {e.details['writeErrors'][:1]}")
+                except Exception:
+                    # Keep the batch buffered; the next flush retries it
+                    self._has_room.set()
+                    raise
+                del self._pending[:len(batch)]
+                self._has_room.set()
+
+    def stats(self):
+        return {"pending": len(self._pending), "written": self.written, "failed": self.failed}
@@ -15,19 +15,10 @@ export const StudyToolsPanel = ({ content }) => {
     
     setLoading(prev => ({ ...prev, [type]: true }));
     try {
+      // Flashcards, key terms and quizzes arrive as validated arrays; summaries as text
       const result = await apiService.generateStudyAids(content, type);
       
-      let parsedContent = result.content;
-      try {
-        const jsonMatch = result.content.match(/\[.*\]/s);
-        if (jsonMatch) {
-          parsedContent = JSON.parse(jsonMatch[0]);
-        }
-      } catch (e) {
-        // Keep as string if not JSON
-      }
-      
-      setStudyAids(prev => ({ ...prev, [type]: parsedContent }));
+      setStudyAids(prev => ({ ...prev, [type]: result.content }));
       toast.success(`${type.charAt(0).toUpperCase() + type.slice(1)} generated!`);
     } catch (error) {
       toast.error(`Failed to generate ${type}`);
@@ -3,12 +3,65 @@ import { Upload, Youtube, Loader2, Video } from 'lucide-react';
 import { Button } from './ui/button';
 import { toast } from 'sonner';
 
+const TRANSCRIPTION_POLL_INTERVAL_MS = 2000;
+// Give up on a job that has not finished in this long (long videos take several minutes)
+const TRANSCRIPTION_TIMEOUT_MS = 20 * 60 * 1000;
+
+const STAGE_LABELS = {
+  queued: 'Waiting for a free transcription worker...',
+  uploading: 'Sending the video to the AI...',
+  processing: 'The AI is preparing the video...',
+  transcribing: 'Transcribing the video...',
+};
+
 export const VideoUploader = ({ onVideoProcessed }) => {
   const [isProcessing, setIsProcessing] = useState(false);
+  const [stage, setStage] = useState(null);
   const [youtubeUrl, setYoutubeUrl] = useState('');
   const [uploadMode, setUploadMode] = useState('file'); // 'file' or 'youtube'
   const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || '';
 
+  // Transcription runs as a background job; queue it and poll until it finishes
+  const transcribeVideo = async (videoId) => {
+    const queueResponse = await fetch(`${BACKEND_URL}/api/transcribe-video?video_id=${videoId}`, {
+      method: 'POST',
+    });
+
+    const queueData = await queueResponse.json();
+
+    if (!queueResponse.ok) {
+      const errorMessage = queueData.detail || queueData.error || 'Video transcription failed';
+      throw new Error(errorMessage);
+    }
+
+    // Previously transcribed videos come back completed straight away
+    if (queueData.status === 'completed') {
+      return queueData;
+    }
+
+    setStage(queueData.stage || 'queued');
+    const deadline = Date.now() + TRANSCRIPTION_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      await new Promise((resolve) => setTimeout(resolve, TRANSCRIPTION_POLL_INTERVAL_MS));
+
+      const jobResponse = await fetch(`${BACKEND_URL}/api/transcription-jobs/${queueData.job_id}`);
+      const jobData = await jobResponse.json();
+
+      if (!jobResponse.ok || jobData.status === 'failed') {
+        const errorMessage = jobData.error || jobData.detail || 'Video transcription failed';
+        throw new Error(errorMessage);
+      }
+
+      if (jobData.status === 'completed') {
+        return jobData;
+      }
+
+      setStage(jobData.stage || jobData.status);
+    }
+
+    throw new Error('Transcription is taking too long. Please try again later.');
+  };
+
   const handleFileUpload = async (e) => {
     const file = e.target.files[0];
     if (!file) return;
@@ -49,17 +102,7 @@ export const VideoUploader = ({ onVideoProcessed }) => {
       toast.success('Video uploaded! Transcribing...');
 
       // Transcribe video
-      const transcribeResponse = await fetch(`${BACKEND_URL}/api/transcribe-video?video_id=${uploadData.video_id}`, {
-        method: 'POST',
-      });
-
-      // Read response body first
-      const transcriptData = await transcribeResponse.json();
-
-      if (!transcribeResponse.ok) {
-        const errorMessage = transcriptData.detail || transcriptData.error || 'Video transcription failed';
-        throw new Error(errorMessage);
-      }
+      const transcriptData = await transcribeVideo(uploadData.video_id);
       
       // Get video URL
       const videoUrl = `${BACKEND_URL}/api/video-file/${uploadData.video_id}`;
@@ -79,6 +122,7 @@ export const VideoUploader = ({ onVideoProcessed }) => {
       toast.error(error.message || 'Failed to process video. Please try again.');
     } finally {
       setIsProcessing(false);
+      setStage(null);
     }
   };
 
@@ -113,17 +157,7 @@ export const VideoUploader = ({ onVideoProcessed }) => {
       toast.success('YouTube video downloaded! Transcribing...');
 
       // Transcribe video
-      const transcribeResponse = await fetch(`${BACKEND_URL}/api/transcribe-video?video_id=${youtubeData.video_id}`, {
-        method: 'POST',
-      });
-
-      // Read response body first
-      const transcriptData = await transcribeResponse.json();
-
-      if (!transcribeResponse.ok) {
-        const errorMessage = transcriptData.detail || transcriptData.error || 'Video transcription failed';
-        throw new Error(errorMessage);
-      }
+      const transcriptData = await transcribeVideo(youtubeData.video_id);
       
       // Get video URL
       const videoUrl = `${BACKEND_URL}/api/video-file/${youtubeData.video_id}`;
@@ -145,6 +179,7 @@ export const VideoUploader = ({ onVideoProcessed }) => {
       toast.error(error.message || 'Failed to process YouTube video. Please try again.');
     } finally {
       setIsProcessing(false);
+      setStage(null);
     }
   };
 
@@ -267,7 +302,7 @@ export const VideoUploader = ({ onVideoProcessed }) => {
             </div>
           </div>
           <p className="text-blue-400 text-sm font-medium mb-2">
-            Processing your video with AI...
+            {STAGE_LABELS[stage] || 'Processing your video with AI...'}
           </p>
           <p className="text-slate-400 text-xs">
             This may take a few minutes. Please wait.
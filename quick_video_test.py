@@ -59,9 +59,9 @@ def test_endpoints():
     if video_id:
         try:
             response = requests.post(f"{API_BASE}/transcribe-video?video_id={video_id}", timeout=15)
-            if response.status_code == 200:
-                results['transcription'] = {'success': True}
-                print("✅ Transcription endpoint accessible")
+            if response.status_code == 202:
+                results['transcription'] = {'success': True, 'job_id': response.json()['job_id']}
+                print("✅ Transcription job queued")
             elif "Gemini API key not configured" in response.text:
                 results['transcription'] = {'success': True, 'note': 'API key issue expected'}
                 print("✅ Transcription endpoint working (API key issue expected)")
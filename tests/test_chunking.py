@@ -0,0 +1,52 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from chunking import CHARS_PER_TOKEN, map_chunks, split_text
+
+
+def test_short_text_is_one_chunk():
+    assert split_text("Just a sentence.", 100) == ["Just a sentence."]
+    assert split_text("", 100) == [""]
+
+
+def test_paragraphs_are_packed_under_the_budget():
+    paragraphs = [f"Paragraph {i} " + "word " * 20 for i in range(10)]
+    chunks = split_text("\n\n".join(paragraphs), 60)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 60 * CHARS_PER_TOKEN for chunk in chunks)
+    # Nothing lost or reordered
+    assert "\n\n".join(chunks).split() == "\n\n".join(paragraphs).split()
+
+
+def test_long_paragraph_is_cut_on_sentences():
+    paragraph = " ".join(f"Sentence number {i} is here." for i in range(40))
+    chunks = split_text(paragraph, 30)
+    assert all(len(chunk) <= 30 * CHARS_PER_TOKEN for chunk in chunks)
+    assert all(chunk.endswith(".") for chunk in chunks)
+    assert " ".join(chunks) == paragraph
+
+
+def test_unbroken_text_is_hard_split():
+    chunks = split_text("x" * 1000, 50)
+    assert [len(chunk) for chunk in chunks] == [200] * 5
+
+
+@pytest.mark.anyio
+async def test_map_chunks_keeps_order_and_limits_concurrency():
+    running = 0
+    peak = 0
+
+    async def generate(prompt):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 if prompt.endswith("0") else 0)
+        running -= 1
+        return SimpleNamespace(text=prompt.upper())
+
+    chunks = [f"chunk {i}" for i in range(8)]
+    results = await map_chunks(chunks, lambda chunk: f"p {chunk}", generate, concurrency=3)
+    assert results == [f"P CHUNK {i}" for i in range(8)]
+    assert peak <= 3
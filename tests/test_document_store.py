@@ -0,0 +1,48 @@
+import hashlib
+
+import mongomock_motor
+import pytest
+
+from document_store import DocumentStore, join_pages
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DocumentStore(mongomock_motor.AsyncMongoMockClient()["test"]["documents"], tmp_path)
+
+
+def test_join_pages_ends_every_page_with_a_blank_line():
+    assert join_pages(["one", "two"]) == "one\n\ntwo\n\n"
+    assert join_pages([]) == ""
+
+
+@pytest.mark.anyio
+async def test_hash_upload_is_the_sha256_hex_digest(store):
+    assert await store.hash_upload(b"%PDF") == hashlib.sha256(b"%PDF").hexdigest()
+
+
+@pytest.mark.anyio
+async def test_save_round_trips_pages_and_metadata(store):
+    metadata = await store.save("abc", ["first", "second"], filename="notes.pdf", word_count=2)
+    assert metadata["pages"] == 2
+    assert await store.get_pages("abc") == ["first", "second"]
+    assert await store.get_text("abc") == "first\n\nsecond\n\n"
+    stored = await store.get_metadata("abc")
+    assert stored["filename"] == "notes.pdf"
+    assert stored["word_count"] == 2
+
+
+@pytest.mark.anyio
+async def test_second_save_keeps_the_first_metadata_and_blob(store, tmp_path):
+    await store.save("abc", ["first"], filename="a.pdf")
+    await store.save("abc", ["changed"], filename="b.pdf")
+    assert await store.get_pages("abc") == ["first"]
+    assert (await store.get_metadata("abc"))["filename"] == "a.pdf"
+    assert [path.name for path in tmp_path.iterdir()] == ["abc.json"]
+
+
+@pytest.mark.anyio
+async def test_missing_document_returns_none(store):
+    assert await store.get_metadata("nope") is None
+    assert await store.get_pages("nope") is None
+    assert await store.get_text("nope") is None
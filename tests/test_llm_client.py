@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+from llm_client import LLMClient, LLMTimeoutError
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel; records the calls it receives."""
+
+    calls = []
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        FakeModel.calls.append((self.model_name, contents, stream, kwargs))
+        if stream:
+            return iter([SimpleNamespace(text=word) for word in contents.split()])
+        return SimpleNamespace(text=contents.upper(), usage_metadata=None)
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    FakeModel.calls = []
+    monkeypatch.setattr(llm_client.genai, "GenerativeModel", FakeModel)
+    return FakeModel
+
+
+@pytest.mark.anyio
+async def test_run_executes_blocking_call_off_the_event_loop():
+    client = LLMClient(max_concurrency=2)
+    main_thread = threading.get_ident()
+
+    def blocking(value, suffix=""):
+        return threading.get_ident(), value + suffix
+
+    thread_id, result = await client.run(blocking, "a", suffix="b")
+    assert result == "ab"
+    assert thread_id != main_thread
+    client.shutdown()
+
+
+@pytest.mark.anyio
+async def test_run_raises_llm_timeout_error():
+    client = LLMClient(timeout=0.05)
+    with pytest.raises(LLMTimeoutError):
+        await client.run(time.sleep, 0.5)
+    client.shutdown()
+
+
+@pytest.mark.anyio
+async def test_concurrency_is_bounded_by_the_semaphore():
+    client = LLMClient(max_concurrency=2, max_workers=4)
+    lock = threading.Lock()
+    running = peak = 0
+
+    def work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    await asyncio.gather(*(client.run(work) for _ in range(6)))
+    assert peak == 2
+    client.shutdown()
+
+
+@pytest.mark.anyio
+async def test_generate_passes_the_request_timeout_to_gemini(fake_model):
+    client = LLMClient(timeout=7)
+    response = await client.generate("hello", model_name="m")
+    assert response.text == "HELLO"
+    assert fake_model.calls == [("m", "hello", False, {"request_options": {"timeout": 7}})]
+    client.shutdown()
+
+
+@pytest.mark.anyio
+async def test_stream_yields_chunks_in_order(fake_model):
+    client = LLMClient()
+    chunks = [chunk.text async for chunk in client.stream("one two three")]
+    assert chunks == ["one", "two", "three"]
+    client.shutdown()
+
+
+@pytest.mark.anyio
+async def test_stream_reraises_errors_from_the_worker_thread(monkeypatch):
+    class BrokenModel(FakeModel):
+        def generate_content(self, contents, stream=False, **kwargs):
+            raise RuntimeError("quota exceeded")
+
+    monkeypatch.setattr(llm_client.genai, "GenerativeModel", BrokenModel)
+    client = LLMClient()
+    with pytest.raises(RuntimeError, match="quota exceeded"):
+        async for _ in client.stream("anything"):
+            pass
+    client.shutdown()
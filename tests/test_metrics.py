@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+from llm_client import LLMClient
+from metrics import CallbackMetric, Counter, Gauge, Histogram, Registry
+
+
+def test_counter_renders_one_sample_per_label_set():
+    registry = Registry()
+    counter = Counter("requests_total", "Requests", ["endpoint"], registry=registry)
+    counter.inc(endpoint="/a")
+    counter.inc(2, endpoint="/a")
+    counter.inc(endpoint='/b"\n')
+    assert registry.render() == (
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{endpoint="/a"} 3\n'
+        'requests_total{endpoint="/b\\"\\n"} 1\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1), registry=registry)
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value)
+    assert histogram.samples() == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 6.05",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_gauge_track_counts_the_block_while_it_runs():
+    gauge = Gauge("in_flight", "In flight", ["endpoint"], registry=Registry())
+    with gauge.track(endpoint="/a"):
+        assert gauge.samples() == ['in_flight{endpoint="/a"} 1']
+    assert gauge.samples() == ['in_flight{endpoint="/a"} 0']
+
+
+def test_callback_metric_reads_values_at_scrape_time():
+    state = {"size": 1}
+    metric = CallbackMetric("queue_size", "Queue size", "gauge", lambda: {(): state["size"]}, registry=Registry())
+    state["size"] = 7
+    assert metric.samples() == ["queue_size 7"]
+
+
+def test_record_usage_counts_tokens_per_endpoint():
+    before = dict(metrics.gemini_tokens._values)
+    response = SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=12, candidates_token_count=0))
+    metrics.record_usage("m-test", response, "/api/usage-test")
+    metrics.record_usage("m-test", SimpleNamespace(), "/api/usage-test")
+    added = {key: value for key, value in metrics.gemini_tokens._values.items() if key not in before}
+    assert added == {("/api/usage-test", "m-test", "prompt"): 12}
+
+
+@pytest.mark.anyio
+async def test_gemini_calls_are_labelled_with_the_current_endpoint():
+    client = LLMClient()
+    token = metrics.current_endpoint.set("/api/label-test")
+    try:
+        await client.run(lambda: "ok")
+    finally:
+        metrics.current_endpoint.reset(token)
+    await client.run(lambda: "ok")
+    client.shutdown()
+
+    values = metrics.gemini_requests._values
+    assert values[("/api/label-test", "none", "<lambda>", "ok")] == 1
+    assert values[("background", "none", "<lambda>", "ok")] >= 1
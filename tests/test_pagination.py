@@ -0,0 +1,59 @@
+import mongomock_motor
+import pytest
+
+from pagination import _after, decode_cursor, encode_cursor, paginate
+
+SORT = [("timestamp", -1), ("id", -1)]
+
+
+def test_after_builds_keyset_filter():
+    assert _after(SORT, ["2024-01-01", "b"]) == {"$or": [
+        {"timestamp": {"$lt": "2024-01-01"}},
+        {"timestamp": "2024-01-01", "id": {"$lt": "b"}},
+    ]}
+    assert _after([("title", 1), ("id", 1)], ["T", 3]) == {"$or": [
+        {"title": {"$gt": "T"}},
+        {"title": "T", "id": {"$gt": 3}},
+    ]}
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(["2024-01-01T00:00:00", "x"])
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 2) == ["2024-01-01T00:00:00", "x"]
+
+
+@pytest.mark.parametrize("values", [
+    [{"$ne": None}, "x"],
+    [["a"], "x"],
+    [True, "x"],
+])
+def test_decode_rejects_non_scalar_values(values):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(values), 2)
+
+
+@pytest.mark.parametrize("cursor", ["!!!", encode_cursor(["only-one"]), encode_cursor({"a": 1}), "bm90IGpzb24"])
+def test_decode_rejects_malformed_cursors(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 2)
+
+
+@pytest.mark.anyio
+async def test_paginate_walks_every_document_once():
+    collection = mongomock_motor.AsyncMongoMockClient()["test"]["notes"]
+    await collection.insert_many([
+        # Shared timestamps exercise the id tie-break
+        {"id": f"{i:02d}", "timestamp": f"2024-01-{i // 3 + 1:02d}", "user_id": "u"}
+        for i in range(10)
+    ])
+    await collection.insert_one({"id": "zz", "timestamp": "2024-02-01", "user_id": "other"})
+
+    seen, cursor = [], None
+    while True:
+        docs, cursor = await paginate(collection, {"user_id": "u"}, SORT, 3, cursor)
+        assert "_id" not in docs[0]
+        seen.extend(doc["id"] for doc in docs)
+        if cursor is None:
+            break
+    assert seen == [f"{i:02d}" for i in reversed(range(10))]
@@ -0,0 +1,71 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from pdf_extract import PdfExtractor, temp_pdf_path
+
+
+def make_pdf(page_texts):
+    """A minimal PDF with one line of Helvetica text per page."""
+    count = len(page_texts)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count))
+        + b"] /Count %d >>" % count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(page_texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode() + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+@pytest.fixture
+def pdf_path():
+    path = temp_pdf_path()
+    path.write_bytes(make_pdf([f"Page number {i}" for i in range(1, 6)]))
+    yield path
+    path.unlink(missing_ok=True)
+
+
+@pytest.fixture
+def extractor():
+    extractor = PdfExtractor(max_workers=2, pages_per_chunk=2)
+    yield extractor
+    extractor.shutdown()
+
+
+@pytest.mark.anyio
+async def test_extract_returns_pages_in_order(extractor, pdf_path):
+    assert await extractor.page_count(pdf_path) == 5
+    pages = await extractor.extract(pdf_path)
+    assert [page.strip() for page in pages] == [f"Page number {i}" for i in range(1, 6)]
+
+
+@pytest.mark.anyio
+async def test_iter_chunks_yields_first_page_index_per_chunk(extractor, pdf_path):
+    starts = [(start, len(chunk)) async for start, chunk in extractor.iter_chunks(pdf_path, 5)]
+    assert starts == [(0, 2), (2, 2), (4, 1)]
+
+
+@pytest.mark.anyio
+async def test_pool_is_rebuilt_after_a_worker_dies(extractor, pdf_path):
+    with pytest.raises(BrokenProcessPool):
+        await extractor._submit(os._exit, 1)
+    assert extractor._executor is None
+    assert await extractor.page_count(pdf_path) == 5
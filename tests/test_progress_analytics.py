@@ -0,0 +1,45 @@
+from progress_analytics import progress_pipeline, summarize_progress
+
+
+def bucket(_id, count, score=None, minutes=0):
+    return {"_id": _id, "count": count, "average_score": score,
+            "average_duration_minutes": minutes / count if count else None, "total_minutes": minutes}
+
+
+def test_summarize_progress():
+    facets = {
+        "overall": [bucket(None, 3, 82.3333, 45)],
+        "by_activity": [bucket("pdf_read", 2, None, 30), bucket("quiz_completed", 1, 82.3333, 15)],
+        "daily": [{"_id": "2024-05-01", "count": 3, "total_minutes": 45}],
+        "weekly": [{"_id": "2024-W18", "count": 3, "total_minutes": 45},
+                   {"_id": "2024-W17", "count": 1, "total_minutes": 5}],
+        "recent": [{"id": "a"}],
+    }
+    summary = summarize_progress(facets)
+    assert summary["total_activities"] == 3
+    assert summary["pdfs_read"] == 2
+    assert summary["videos_watched"] == 0
+    assert summary["quizzes_completed"] == 1
+    assert summary["average_score"] == 82.33
+    assert summary["by_activity"]["pdf_read"]["average_duration_minutes"] == 15
+    assert summary["daily"] == [{"date": "2024-05-01", "count": 3, "total_minutes": 45}]
+    # Weeks come back newest first and are returned oldest first
+    assert [week["week"] for week in summary["weekly"]] == ["2024-W17", "2024-W18"]
+    assert summary["recent_activities"] == [{"id": "a"}]
+
+
+def test_summarize_progress_without_entries():
+    summary = summarize_progress({"overall": [], "by_activity": [], "daily": [], "weekly": [], "recent": []})
+    assert summary["total_activities"] == 0
+    assert summary["average_score"] is None
+    assert summary["total_minutes"] == 0
+    assert summary["activity_counts"] == {}
+
+
+def test_pipeline_is_one_match_then_facet():
+    pipeline = progress_pipeline("u1", days=7, weeks=4, recent=5)
+    assert pipeline[0] == {"$match": {"user_id": "u1"}}
+    facet = pipeline[-1]["$facet"]
+    assert set(facet) == {"overall", "by_activity", "daily", "weekly", "recent"}
+    assert {"$limit": 4} in facet["weekly"]
+    assert facet["recent"][0] == {"$limit": 5}
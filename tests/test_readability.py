@@ -0,0 +1,48 @@
+import pytest
+
+from readability import ReadabilityStats, analyze, count_syllables, split_paragraphs
+
+
+@pytest.mark.parametrize("word, syllables", [
+    ("cat", 1), ("table", 2), ("make", 1), ("people", 2), ("beautiful", 3),
+    ("jumped", 1), ("wanted", 2), ("boxes", 2), ("don't", 1),
+])
+def test_count_syllables(word, syllables):
+    assert count_syllables(word) == syllables
+
+
+def test_analyze_counts_words_and_sentences():
+    stats = analyze("The cat sat. The dog ran away! Did it?")
+    assert stats.words == 9
+    assert stats.sentences == 3
+
+
+def test_trailing_text_without_terminator_is_a_sentence():
+    assert analyze("No full stop here").sentences == 1
+    assert analyze("Ends cleanly.").sentences == 1
+    assert analyze("Dots... and more?!").sentences == 2
+
+
+def test_empty_text_scores_without_dividing_by_zero():
+    stats = analyze("")
+    assert stats == ReadabilityStats()
+    assert stats.to_dict()["word_count"] == 0
+    assert 0 <= stats.reading_score <= 100
+
+
+def test_section_stats_add_up_to_the_whole_document():
+    pages = ["The cat sat on the mat.", "Photosynthesis converts electromagnetic radiation."]
+    assert sum((analyze(page) for page in pages), ReadabilityStats()) == analyze(" ".join(pages))
+
+
+def test_simple_text_reads_easier_than_technical_text():
+    simple = analyze("The dog ran. The cat sat. We had fun.")
+    technical = analyze("Photosynthesis converts electromagnetic radiation into biochemical energy.")
+    assert simple.reading_score > technical.reading_score
+    assert simple.flesch_kincaid_grade < technical.flesch_kincaid_grade
+    assert simple.difficult_words == 0
+    assert technical.polysyllables >= 4
+
+
+def test_split_paragraphs_drops_blank_runs():
+    assert split_paragraphs("one\n\n  \n\ntwo\nstill two\n\n") == ["one", "two\nstill two"]
@@ -0,0 +1,69 @@
+import json
+
+import mongomock_motor
+import pytest
+
+from pagination import encode_cursor
+from resource_catalog import ResourceCatalog
+
+
+@pytest.fixture
+async def catalog():
+    collection = mongomock_motor.AsyncMongoMockClient()["test"]["resources"]
+    await collection.insert_many([
+        {"id": f"r{i}", "title": f"Title {i % 3}", "category": "video" if i % 2 else "article"}
+        for i in range(7)
+    ])
+    catalog = ResourceCatalog(collection, page_size=3)
+    await catalog.refresh()
+    return catalog
+
+
+@pytest.mark.anyio
+async def test_pages_follow_title_then_id_order(catalog):
+    titles = []
+    cursor = None
+    while True:
+        body, etag = await catalog.page(cursor=cursor)
+        page = json.loads(body)
+        titles += [(r["title"], r["id"]) for r in page["resources"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert titles == sorted(titles)
+    assert len(titles) == 7
+
+
+@pytest.mark.anyio
+async def test_first_page_is_precomputed_with_a_stable_etag(catalog):
+    first = await catalog.page()
+    assert await catalog.page() is first
+    body, etag = first
+    assert etag.startswith('"') and len(etag) == 34
+
+
+@pytest.mark.anyio
+async def test_category_listing(catalog):
+    body, _ = await catalog.page(category="video", limit=10)
+    page = json.loads(body)
+    assert {r["category"] for r in page["resources"]} == {"video"}
+    assert len(page["resources"]) == 3
+    assert page["next_cursor"] is None
+
+    body, _ = await catalog.page(category="missing")
+    assert json.loads(body) == {"resources": [], "next_cursor": None}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("cursor", ["garbage!", encode_cursor([1, 2]), encode_cursor([{"$gt": ""}, "x"])])
+async def test_bad_cursor_is_rejected(catalog, cursor):
+    with pytest.raises(ValueError):
+        await catalog.page(cursor=cursor)
+
+
+@pytest.mark.anyio
+async def test_refresh_picks_up_writes(catalog):
+    await catalog.collection.insert_one({"id": "new", "title": "A first", "category": "article"})
+    await catalog.refresh()
+    body, _ = await catalog.page()
+    assert json.loads(body)["resources"][0]["id"] == "new"
@@ -0,0 +1,61 @@
+import mongomock_motor
+import pytest
+
+from response_cache import ResponseCache, cache_key
+
+
+def make_cache(**kwargs):
+    return ResponseCache(mongomock_motor.AsyncMongoMockClient()["test"]["response_cache"], **kwargs)
+
+
+def test_cache_key_is_stable_and_depends_on_every_input():
+    key = cache_key("simplify", 1, "text", reading_level=5, disability_type="adhd")
+    assert key == cache_key("simplify", 1, "text", disability_type="adhd", reading_level=5)
+    assert key != cache_key("simplify", 2, "text", reading_level=5, disability_type="adhd")
+    assert key != cache_key("simplify", 1, "text", reading_level=6, disability_type="adhd")
+    assert key != cache_key("translate", 1, "text", reading_level=5, disability_type="adhd")
+
+
+@pytest.mark.anyio
+async def test_set_then_get_is_a_memory_hit():
+    cache = make_cache()
+    await cache.set("k", "simplify", {"simplified_text": "short"})
+    assert await cache.get("k") == {"simplified_text": "short"}
+    assert cache.stats()["memory_hits"] == 1
+
+
+@pytest.mark.anyio
+async def test_evicted_entries_are_served_from_mongo():
+    cache = make_cache(max_entries=1)
+    await cache.set("a", "simplify", {"n": 1})
+    await cache.set("b", "simplify", {"n": 2})
+    assert await cache.get("a") == {"n": 1}
+    stats = cache.stats()
+    assert stats["mongo_hits"] == 1
+    assert stats["memory_entries"] == 1
+
+
+@pytest.mark.anyio
+async def test_miss_is_counted():
+    cache = make_cache()
+    assert await cache.get("missing") is None
+    assert cache.stats() == {
+        "hits": 0, "memory_hits": 0, "mongo_hits": 0, "misses": 1, "hit_ratio": 0.0, "memory_entries": 0,
+    }
+
+
+class BrokenCollection:
+    async def find_one(self, *args, **kwargs):
+        raise ConnectionError("mongo down")
+
+    async def replace_one(self, *args, **kwargs):
+        raise ConnectionError("mongo down")
+
+
+@pytest.mark.anyio
+async def test_mongo_failures_degrade_to_memory_only():
+    cache = ResponseCache(BrokenCollection())
+    await cache.set("k", "simplify", {"n": 1})
+    assert await cache.get("k") == {"n": 1}
+    assert await cache.get("other") is None
+    assert cache.stats()["misses"] == 1
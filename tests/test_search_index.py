@@ -0,0 +1,95 @@
+import mongomock_motor
+import pytest
+
+from search_index import SearchIndex, make_snippet, query_terms
+
+
+def test_query_terms_keeps_phrases_and_drops_negations():
+    assert query_terms('cell "cell wall" -plant') == ["cell", "cell wall"]
+
+
+def test_snippet_marks_matches_and_escapes_html():
+    text = "<b>Intro</b> " + "x" * 200 + " the Mitochondria is the powerhouse " + "y" * 200
+    snippet = make_snippet(text, ["mitochondria"], radius=20)
+    assert "<mark>Mitochondria</mark>" in snippet
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert "<b>" not in make_snippet(text, ["intro"])
+
+
+def test_snippet_without_a_match_is_the_escaped_start():
+    assert make_snippet("a < b and more", ["zebra"], radius=3) == "a &lt; b "
+
+
+@pytest.mark.anyio
+async def test_reindexing_replaces_the_previous_entries():
+    collection = mongomock_motor.AsyncMongoMockClient()["test"]["search_index"]
+    index = SearchIndex(collection)
+    await index.index_document("doc", "a.pdf", ["page one", "  ", "page three"])
+    assert [entry["part"] async for entry in collection.find({"ref_id": "doc"})] == [1, 3]
+    await index.index_document("doc", "a.pdf", ["only page"])
+    assert await collection.count_documents({"ref_id": "doc"}) == 1
+
+
+@pytest.mark.anyio
+async def test_notes_keep_their_owner():
+    collection = mongomock_motor.AsyncMongoMockClient()["test"]["search_index"]
+    await SearchIndex(collection).index_note(
+        {"id": "n1", "content": "my note", "highlights": ["cells"], "document_id": "doc", "user_id": "alice"}
+    )
+    note = await collection.find_one({"kind": "note"})
+    assert (note["title"], note["user_id"], note["document_id"]) == ("cells", "alice", "doc")
+
+
+class RecordingCollection:
+    """Captures the search filter; mongomock has no $text support."""
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.filters = None
+
+    def find(self, filters, projection):
+        self.filters = filters
+        return self
+
+    def sort(self, *args):
+        return self
+
+    def skip(self, n):
+        return self
+
+    def limit(self, n):
+        return self
+
+    async def to_list(self, length):
+        return self.hits[:length]
+
+
+def hit(n):
+    return {"kind": "document", "ref_id": f"d{n}", "part": 1, "title": "t", "score": 1.23456, "text": "cell biology"}
+
+
+@pytest.mark.anyio
+async def test_search_excludes_notes_without_a_user():
+    collection = RecordingCollection([])
+    await SearchIndex(collection).search("cell")
+    assert collection.filters["$and"] == [{"kind": {"$ne": "note"}}]
+
+
+@pytest.mark.anyio
+async def test_search_only_matches_the_users_own_notes():
+    collection = RecordingCollection([])
+    await SearchIndex(collection).search("cell", kinds=["note"], document_id="doc", user_id="alice")
+    assert collection.filters["kind"] == {"$in": ["note"]}
+    assert collection.filters["$and"] == [
+        {"$or": [{"kind": {"$ne": "note"}}, {"user_id": "alice"}]},
+        {"$or": [{"ref_id": "doc"}, {"document_id": "doc"}]},
+    ]
+
+
+@pytest.mark.anyio
+async def test_search_pages_results_with_snippets():
+    result = await SearchIndex(RecordingCollection([hit(n) for n in range(3)])).search("cell", page_size=2)
+    assert result["has_more"] is True
+    assert [r["ref_id"] for r in result["results"]] == ["d0", "d1"]
+    assert result["results"][0]["score"] == 1.2346
+    assert result["results"][0]["snippet"] == "<mark>cell</mark> biology"
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from study_aids import generation_config, parse_study_aid
+
+FLASHCARDS = [{"front": "Cell", "back": "Basic unit of life"}]
+
+
+def test_valid_json_is_parsed():
+    assert parse_study_aid("flashcards", json.dumps(FLASHCARDS)) == FLASHCARDS
+
+
+def test_fenced_json_with_prose_is_repaired():
+    text = "Here you go:\n```json\n" + json.dumps(FLASHCARDS) + "\n```\nEnjoy!"
+    assert parse_study_aid("flashcards", text) == FLASHCARDS
+
+
+def test_quiz_answer_must_index_an_option():
+    quiz = [{"question": "2+2?", "options": ["3", "4"], "correct": 1}]
+    assert parse_study_aid("quiz", json.dumps(quiz)) == quiz
+    quiz[0]["correct"] = 2
+    with pytest.raises(ValueError, match="Invalid quiz output"):
+        parse_study_aid("quiz", json.dumps(quiz))
+
+
+@pytest.mark.parametrize("text", ["not json", '[{"term": "x"}]', '{"term": "x", "definition": "y"}'])
+def test_invalid_output_raises(text):
+    with pytest.raises(ValueError):
+        parse_study_aid("keyterms", text)
+
+
+def test_summary_stays_text():
+    assert parse_study_aid("summary", "A short summary.") == "A short summary."
+    assert generation_config("summary") is None
+    assert generation_config("quiz")["response_mime_type"] == "application/json"
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import mongomock_motor
+import pytest
+
+import tracing
+
+
+def test_spans_outside_a_trace_are_no_ops():
+    with tracing.span("orphan") as current:
+        assert current is None
+    assert tracing.start_span("orphan") is None
+
+
+def test_nested_spans_attach_to_their_parent():
+    with tracing.trace("request") as root:
+        with tracing.span("child", answer=42) as child:
+            with tracing.span("grandchild") as grandchild:
+                pass
+    assert [span.name for span in root.trace.spans] == ["request", "child", "grandchild"]
+    assert child.parent_id == root.span_id
+    assert grandchild.parent_id == child.span_id
+    assert all(span.end_ns is not None for span in root.trace.spans)
+    assert tracing._current.get() is None
+
+
+def test_errors_are_recorded_on_the_span():
+    with pytest.raises(ValueError):
+        with tracing.trace("request") as root:
+            with tracing.span("child"):
+                raise ValueError("bad page")
+    assert root.trace.spans[1].status == (tracing.STATUS_ERROR, "ValueError: bad page")
+    assert root.status == (tracing.STATUS_ERROR, "ValueError: bad page")
+
+
+def test_format_tree_indents_children():
+    with tracing.trace("request") as root:
+        with tracing.span("child", pages=3):
+            pass
+    lines = tracing.format_tree(root.trace).splitlines()
+    assert lines[0].startswith("request ")
+    assert lines[1].startswith("  child ") and lines[1].endswith("pages=3")
+
+
+def test_otlp_encoding():
+    with tracing.trace("request", tracing.SERVER, route="/api/x", skipped=None) as root:
+        with tracing.span("child", ok=True, pages=2, ratio=0.5):
+            pass
+    payload = tracing.to_otlp(root.trace)
+    spans = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert [span["name"] for span in spans] == ["request", "child"]
+    assert "parentSpanId" not in spans[0]
+    assert spans[1]["parentSpanId"] == spans[0]["spanId"]
+    assert spans[0]["attributes"] == [{"key": "route", "value": {"stringValue": "/api/x"}}]
+    assert spans[1]["attributes"] == [
+        {"key": "ok", "value": {"boolValue": True}},
+        {"key": "pages", "value": {"intValue": "2"}},
+        {"key": "ratio", "value": {"doubleValue": 0.5}},
+    ]
+    json.dumps(payload)
+
+
+@pytest.mark.anyio
+async def test_spawned_tasks_start_outside_the_trace():
+    async def background():
+        return tracing._current.get()
+
+    with tracing.trace("request"):
+        assert await tracing.spawn(background()) is None
+        assert await asyncio.create_task(background()) is not None
+
+
+@pytest.mark.anyio
+async def test_traced_database_records_mongo_operations():
+    db = tracing.TracedDatabase(mongomock_motor.AsyncMongoMockClient()["test"])
+    with tracing.trace("request") as root:
+        await db.notes.insert_one({"n": 1})
+        await db["notes"].find({}).sort("n", 1).to_list(length=None)
+        async for _ in db.notes.find({}):
+            pass
+    names = [span.name for span in root.trace.spans[1:]]
+    assert names == ["mongo insert_one", "mongo find", "mongo find"]
+    assert root.trace.spans[3].attributes["db.documents"] == 1
+
+
+def test_exporter_appends_finished_traces_to_the_file(tmp_path):
+    export_file = tmp_path / "traces.jsonl"
+    tracing.configure(export_file=str(export_file))
+    try:
+        with tracing.trace("job"):
+            pass
+    finally:
+        tracing.shutdown()
+    lines = export_file.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"] == "job"
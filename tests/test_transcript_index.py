@@ -0,0 +1,52 @@
+from transcript_index import DEFAULT_LAST_SEGMENT_SECONDS, SegmentIndex
+
+SEGMENTS = [
+    {"start": 10.0, "end": 20.0, "text": "second"},
+    {"start": 0.0, "end": 5.0, "text": "first"},
+    {"start": 20.0, "end": None, "text": "third"},
+    {"start": 30.0, "end": None, "text": "last"},
+    {"start": None, "text": "untimed"},
+]
+
+
+def test_segments_are_sorted_and_untimed_ones_dropped():
+    index = SegmentIndex(SEGMENTS)
+    assert len(index) == 4
+    assert [s["text"] for s in index.segments] == ["first", "second", "third", "last"]
+
+
+def test_at_finds_the_segment_playing():
+    index = SegmentIndex(SEGMENTS)
+    assert index.at(0.0) == (0, SEGMENTS[1])
+    assert index.at(4.99)[1]["text"] == "first"
+    assert index.at(10.0)[1]["text"] == "second"
+    # No explicit end: runs until the next segment starts
+    assert index.at(29.9)[1]["text"] == "third"
+
+
+def test_at_outside_any_segment():
+    index = SegmentIndex(SEGMENTS)
+    assert index.at(-1.0) == (None, None)
+    # Gap between "first" (ends at 5) and "second" (starts at 10)
+    assert index.at(7.0) == (None, None)
+    assert index.at(30.0 + DEFAULT_LAST_SEGMENT_SECONDS) == (None, None)
+
+
+def test_between_returns_overlapping_segments():
+    index = SegmentIndex(SEGMENTS)
+    assert [s["text"] for s in index.between(4.0, 12.0)] == ["first", "second"]
+    assert [s["text"] for s in index.between(5.0, 10.0)] == []
+    assert [s["text"] for s in index.between(15.0, 31.0)] == ["second", "third", "last"]
+    assert [s["text"] for s in index.between(100.0, 200.0)] == []
+
+
+def test_empty_index():
+    index = SegmentIndex([])
+    assert index.at(1.0) == (None, None)
+    assert index.between(0.0, 10.0) == []
+
+
+def test_webvtt_and_srt_timestamps():
+    index = SegmentIndex([{"start": 3661.5, "end": 3662.25, "text": "hi"}])
+    assert index.to_webvtt() == "WEBVTT\n\n1\n01:01:01.500 --> 01:01:02.250\nhi\n"
+    assert index.to_srt() == "1\n01:01:01,500 --> 01:01:02,250\nhi\n"
@@ -0,0 +1,47 @@
+from transcript_parser import TranscriptParser, parse_transcript
+
+
+def test_parse_timestamps_and_ends():
+    segments = parse_transcript("[00:00] Hello\n[00:05] World\n[01:02:03] Late", duration=4000)
+    assert [(s["start"], s["end"], s["text"]) for s in segments] == [
+        (0.0, 5.0, "Hello"),
+        (5.0, 3723.0, "World"),
+        (3723.0, 4000, "Late"),
+    ]
+    assert segments[2]["timestamp"] == "01:02:03"
+
+
+def test_continuation_lines_join_the_previous_segment():
+    segments = parse_transcript("intro without timestamp\n[00:01] One\ntwo\n\nthree\n[00:04] Four")
+    assert [s["text"] for s in segments] == ["One two three", "Four"]
+
+
+def test_empty_timestamp_lines_are_dropped():
+    segments = parse_transcript("[00:01]\n[00:02] Text")
+    assert [s["text"] for s in segments] == ["Text"]
+    assert segments[0]["end"] is None
+
+
+def test_feed_returns_segments_once_their_end_is_known():
+    parser = TranscriptParser(duration=30)
+    assert parser.feed("[00:00] Hel") == []
+    assert parser.feed("lo\n[00:0") == []
+    completed = parser.feed("7] There\n")
+    assert [(s["text"], s["end"]) for s in completed] == [("Hello", 7.0)]
+    segments = parser.close()
+    assert [(s["text"], s["end"]) for s in segments] == [("Hello", 7.0), ("There", 30)]
+
+
+def test_close_flushes_an_unterminated_line():
+    parser = TranscriptParser()
+    parser.feed("[00:00] A\n[00:03] B")
+    assert [s["text"] for s in parser.close()] == ["A", "B"]
+
+
+def test_minutes_past_99_are_not_folded_into_the_previous_segment():
+    segments = parse_transcript("[99:58] Almost\n[100:05] Past the hundred\n[123:45:06] Hours")
+    assert [(s["start"], s["text"]) for s in segments] == [
+        (5998.0, "Almost"),
+        (6005.0, "Past the hundred"),
+        (123 * 3600 + 45 * 60 + 6.0, "Hours"),
+    ]
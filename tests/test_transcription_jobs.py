@@ -0,0 +1,115 @@
+import asyncio
+from datetime import timedelta
+
+import mongomock_motor
+import pytest
+
+from transcription_jobs import COMPLETED, FAILED, QUEUED, RUNNING, TranscriptionJobs, _now
+
+
+def make_collection():
+    return mongomock_motor.AsyncMongoMockClient()["test"]["transcription_jobs"]
+
+
+async def wait_for_status(jobs, job_id, status):
+    for _ in range(200):
+        job = await jobs.get(job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job never reached {status}: {job}")
+
+
+@pytest.mark.anyio
+async def test_worker_runs_a_submitted_job_and_stores_the_result():
+    stages = []
+
+    async def handler(job, report):
+        await report("uploading")
+        stages.append(job["video_id"])
+        return {"transcript": "hello"}
+
+    jobs = TranscriptionJobs(make_collection(), handler, workers=1, poll_interval=0.05)
+    jobs.start()
+    job = await jobs.submit(video_id="v1")
+    assert job["status"] == QUEUED
+    done = await wait_for_status(jobs, job["job_id"], COMPLETED)
+    await jobs.stop()
+    assert done["result"] == {"transcript": "hello"}
+    assert done["attempts"] == 1
+    assert stages == ["v1"]
+
+
+@pytest.mark.anyio
+async def test_handler_errors_fail_the_job():
+    async def handler(job, report):
+        raise RuntimeError("Gemini rejected the video")
+
+    jobs = TranscriptionJobs(make_collection(), handler, workers=1, poll_interval=0.05)
+    jobs.start()
+    job = await jobs.submit(video_id="v1")
+    failed = await wait_for_status(jobs, job["job_id"], FAILED)
+    await jobs.stop()
+    assert failed["error"] == "Gemini rejected the video"
+
+
+@pytest.mark.anyio
+async def test_result_from_a_lost_lease_is_discarded():
+    collection = make_collection()
+    jobs = TranscriptionJobs(collection, handler=None)
+    job = await jobs.submit(video_id="v1")
+    stale = await jobs._claim()
+    # The lease lapsed and another worker claimed the job
+    await collection.update_one({"job_id": job["job_id"]}, {"$set": {"lease_until": _now() - timedelta(seconds=1)}})
+    current = await jobs._claim()
+    assert current["lease_token"] != stale["lease_token"]
+
+    assert not await jobs._update(stale, status=COMPLETED, result="stale")
+    assert await jobs._update(current, status=COMPLETED, result="fresh")
+    assert (await jobs.get(job["job_id"]))["result"] == "fresh"
+
+
+@pytest.mark.anyio
+async def test_worker_survives_a_failing_claim():
+    class FlakyJobs(TranscriptionJobs):
+        failures = 2
+
+        async def _claim(self):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("mongo blip")
+            return await super()._claim()
+
+    async def handler(job, report):
+        return "ok"
+
+    jobs = FlakyJobs(make_collection(), handler, workers=1, poll_interval=0.01)
+    jobs.start()
+    job = await jobs.submit(video_id="v1")
+    await wait_for_status(jobs, job["job_id"], COMPLETED)
+    await jobs.stop()
+
+
+@pytest.mark.anyio
+async def test_abandoned_final_attempt_is_reported_as_failed():
+    collection = make_collection()
+    jobs = TranscriptionJobs(collection, handler=None, max_attempts=1)
+    job = await jobs.submit(video_id="v1")
+    await jobs._claim()
+    await collection.update_one({"job_id": job["job_id"]}, {"$set": {"lease_until": _now() - timedelta(seconds=1)}})
+
+    assert await jobs._claim() is None
+    assert await jobs.find_active(video_id="v1") is None
+    abandoned = await jobs.get(job["job_id"])
+    assert abandoned["status"] == FAILED
+    assert abandoned["error"] == "Worker stopped responding"
+
+
+@pytest.mark.anyio
+async def test_find_active_returns_queued_and_running_jobs():
+    jobs = TranscriptionJobs(make_collection(), handler=None)
+    job = await jobs.submit(video_id="v1")
+    assert (await jobs.find_active(video_id="v1"))["job_id"] == job["job_id"]
+    await jobs._claim()
+    assert (await jobs.find_active(video_id="v1"))["status"] == RUNNING
+    assert await jobs.find_active(video_id="v2") is None
@@ -0,0 +1,79 @@
+import asyncio
+
+import mongomock_motor
+import pytest
+
+from tutor_sessions import STUDENT, TUTOR, TutorSessions
+
+
+class FakeSummarizer:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    async def __call__(self, summary, turns):
+        self.calls.append((summary, [turn["text"] for turn in turns]))
+        if self.fail:
+            raise ConnectionError("Gemini unavailable")
+        return f"{summary}+{len(turns)}", 10, 5
+
+
+def make_sessions(summarize, **kwargs):
+    collection = mongomock_motor.AsyncMongoMockClient()["test"]["tutor_sessions"]
+    return TutorSessions(collection, summarize, **kwargs)
+
+
+async def record_exchanges(sessions, session_id, count, first=0):
+    for i in range(first, first + count):
+        await sessions.record(session_id, f"q{i}", f"a{i}", prompt_tokens=3, response_tokens=4)
+        await asyncio.gather(*sessions._tasks)
+
+
+@pytest.mark.anyio
+async def test_record_appends_turns_and_charges_tokens():
+    sessions = make_sessions(FakeSummarizer())
+    session = await sessions.create(user_id="u1", student_level="beginner")
+    await record_exchanges(sessions, session["session_id"], 1)
+
+    stored = await sessions.get(session["session_id"])
+    assert [(turn["role"], turn["text"]) for turn in stored["turns"]] == [(STUDENT, "q0"), (TUTOR, "a0")]
+    assert stored["turn_count"] == 1
+    assert stored["tokens"] == {"prompt": 3, "response": 4, "summary": 0}
+
+
+@pytest.mark.anyio
+async def test_overflowing_the_window_folds_the_oldest_turns_into_the_summary():
+    summarizer = FakeSummarizer()
+    sessions = make_sessions(summarizer, window_turns=4, compact_turns=4)
+    session = await sessions.create()
+    await record_exchanges(sessions, session["session_id"], 3)
+    assert summarizer.calls == []
+
+    await record_exchanges(sessions, session["session_id"], 1, first=3)
+    assert summarizer.calls == [("", ["q0", "a0", "q1", "a1"])]
+    stored = await sessions.get(session["session_id"])
+    assert [turn["text"] for turn in stored["turns"]] == ["q2", "a2", "q3", "a3"]
+    assert stored["summary"] == "+4"
+    assert stored["tokens"]["summary"] == 15
+    assert sessions._locks == {}
+
+
+@pytest.mark.anyio
+async def test_failed_summary_keeps_every_turn():
+    sessions = make_sessions(FakeSummarizer(fail=True), window_turns=2, compact_turns=2)
+    session = await sessions.create()
+    await record_exchanges(sessions, session["session_id"], 2)
+
+    stored = await sessions.get(session["session_id"])
+    assert len(stored["turns"]) == 4
+    assert stored["summary"] == ""
+    assert sessions._locks == {}
+
+
+@pytest.mark.anyio
+async def test_delete():
+    sessions = make_sessions(FakeSummarizer())
+    session = await sessions.create()
+    assert await sessions.delete(session["session_id"]) is True
+    assert await sessions.get(session["session_id"]) is None
+    assert await sessions.delete(session["session_id"]) is False
@@ -0,0 +1,78 @@
+import mongomock_motor
+import pytest
+
+from vector_index import VectorIndex
+
+VOCABULARY = ["cell", "planet", "music"]
+
+
+class FakeEmbedder:
+    """Bag-of-words vectors over a tiny vocabulary; counts document embeddings."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.document_calls = 0
+
+    async def __call__(self, texts, task_type):
+        if task_type == "retrieval_document":
+            self.document_calls += 1
+            if self.fail:
+                raise ConnectionError("embedding API unavailable")
+        return [[text.lower().count(word) for word in VOCABULARY] for text in texts]
+
+
+def make_collection():
+    return mongomock_motor.AsyncMongoMockClient()["test"]["embeddings"]
+
+
+def loader(text):
+    async def load():
+        return text
+    return load
+
+
+SOURCES = {
+    "biology": loader("The cell membrane surrounds every cell."),
+    "astronomy": loader("A planet orbits a star."),
+}
+
+
+@pytest.mark.anyio
+async def test_search_ranks_the_matching_chunk_first():
+    index = VectorIndex(make_collection(), FakeEmbedder())
+    results = await index.search(SOURCES, "what is a cell?", k=2)
+    assert results[0]["text"] == "The cell membrane surrounds every cell."
+    assert results[0]["score"] == pytest.approx(1.0)
+    assert len(results) == 2
+
+
+@pytest.mark.anyio
+async def test_sources_are_embedded_once_and_reloaded_from_mongo():
+    collection = make_collection()
+    embedder = FakeEmbedder()
+    await VectorIndex(collection, embedder).search(SOURCES, "planet")
+    assert embedder.document_calls == 2
+
+    restarted = VectorIndex(collection, embedder)
+    results = await restarted.search(SOURCES, "planet", k=1)
+    assert results[0]["text"] == "A planet orbits a star."
+    assert embedder.document_calls == 2
+
+
+@pytest.mark.anyio
+async def test_empty_sources_are_skipped():
+    index = VectorIndex(make_collection(), FakeEmbedder())
+    assert await index.search({"blank": loader("   ")}, "cell") == []
+    assert index._locks == {}
+
+
+@pytest.mark.anyio
+async def test_failed_embedding_releases_the_source_lock():
+    embedder = FakeEmbedder(fail=True)
+    index = VectorIndex(make_collection(), embedder)
+    with pytest.raises(ConnectionError):
+        await index.search(SOURCES, "cell")
+    assert index._locks == {}
+
+    embedder.fail = False
+    assert (await index.search(SOURCES, "cell", k=1))[0]["text"].startswith("The cell")
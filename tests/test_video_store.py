@@ -0,0 +1,127 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import mongomock_motor
+import pytest
+from starlette.requests import Request
+
+from video_store import VideoEntry, VideoIndex, _parse_range, video_response
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=10-", (10, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=990-5000", (990, 999)),
+    (" bytes=5-5 ", (5, 5)),
+    ("bytes=0-1,5-9", None),
+    ("items=0-1", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert _parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=50-10", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        _parse_range(header, 1000)
+
+
+@pytest.fixture
+def entry(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(bytes(range(256)) * 4)
+    stat = path.stat()
+    return VideoEntry("clip", path, stat.st_size, "video/mp4", stat.st_mtime)
+
+
+def make_request(**headers):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+async def body(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+@pytest.mark.anyio
+async def test_full_response(entry):
+    response = video_response(make_request(), entry)
+    assert response.status_code == 200
+    assert response.headers["content-length"] == "1024"
+    assert response.headers["etag"] == entry.etag
+    assert response.headers["accept-ranges"] == "bytes"
+    assert await body(response) == entry.path.read_bytes()
+
+
+@pytest.mark.anyio
+async def test_range_response(entry):
+    response = video_response(make_request(range="bytes=256-511"), entry)
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 256-511/1024"
+    assert response.headers["content-length"] == "256"
+    assert await body(response) == bytes(range(256))
+
+
+def test_unsatisfiable_range(entry):
+    response = video_response(make_request(range="bytes=2000-"), entry)
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+
+
+def test_conditional_requests(entry):
+    assert video_response(make_request(if_none_match=entry.etag), entry).status_code == 304
+    assert video_response(make_request(if_none_match='"other", ' + entry.etag), entry).status_code == 304
+    assert video_response(make_request(if_none_match='"other"'), entry).status_code == 200
+    assert video_response(make_request(if_modified_since=entry.last_modified), entry).status_code == 304
+
+
+def test_stale_if_range_sends_the_whole_file(entry):
+    response = video_response(make_request(range="bytes=0-9", if_range='"stale"'), entry)
+    assert response.status_code == 200
+    response = video_response(make_request(range="bytes=0-9", if_range=entry.etag), entry)
+    assert response.status_code == 206
+
+
+@pytest.mark.anyio
+async def test_index_evicts_entries_whose_file_is_gone(tmp_path):
+    index = VideoIndex(mongomock_motor.AsyncMongoMockClient()["test"]["videos"], tmp_path, revalidate_seconds=0)
+    path = tmp_path / "a.mp4"
+    path.write_bytes(b"x" * 10)
+    await index.register({"video_id": "a", "path": str(path)})
+    assert (await index.get("a")).size == 10
+
+    path.write_bytes(b"x" * 20)
+    assert (await index.get("a")).size == 20
+
+    path.unlink()
+    assert await index.get("a") is None
+
+
+@pytest.mark.anyio
+async def test_retention_sweep(tmp_path):
+    collection = mongomock_motor.AsyncMongoMockClient()["test"]["videos"]
+    index = VideoIndex(collection, tmp_path, max_bytes=250, max_age_seconds=10 * 86400, touch_interval=60)
+    now = datetime.now(timezone.utc)
+    last_used = {"old": now - timedelta(days=20), "idle": now - timedelta(days=2), "new1": now, "new2": now}
+    for video_id, used_at in last_used.items():
+        path = tmp_path / f"{video_id}.mp4"
+        path.write_bytes(b"x" * 100)
+        await collection.insert_one({
+            "video_id": video_id, "path": str(path), "size": 100, "last_accessed": used_at.isoformat(),
+        })
+    orphan = tmp_path / "abandoned.part"
+    orphan.write_bytes(b"x")
+    os.utime(orphan, (now.timestamp() - 3600,) * 2)
+    (tmp_path / "uploading.mp4").write_bytes(b"x")
+
+    # "old" is past the age limit, "idle" is the least recently used over the size cap
+    assert await index.sweep() == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["new1.mp4", "new2.mp4", "uploading.mp4"]
+    assert sorted(doc["video_id"] for doc in await collection.find().to_list(length=None)) == ["new1", "new2"]
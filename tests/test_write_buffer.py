@@ -0,0 +1,81 @@
+import asyncio
+
+import mongomock_motor
+import pytest
+
+from write_buffer import WriteBehindBuffer
+
+
+def make_collection():
+    return mongomock_motor.AsyncMongoMockClient()["test"]["progress"]
+
+
+@pytest.mark.anyio
+async def test_stop_flushes_pending_documents():
+    collection = make_collection()
+    buffer = WriteBehindBuffer(collection, batch_size=10, flush_interval=60)
+    buffer.start()
+    await buffer.add({"n": i} for i in range(25))
+    await buffer.stop()
+    assert await collection.count_documents({}) == 25
+    assert buffer.stats() == {"pending": 0, "written": 25, "failed": 0}
+
+
+@pytest.mark.anyio
+async def test_full_batch_is_written_without_waiting_for_the_interval():
+    collection = make_collection()
+    buffer = WriteBehindBuffer(collection, batch_size=5, flush_interval=60)
+    buffer.start()
+    await buffer.add([{"n": i} for i in range(5)])
+    for _ in range(50):
+        if await collection.count_documents({}) == 5:
+            break
+        await asyncio.sleep(0.01)
+    assert await collection.count_documents({}) == 5
+    await buffer.stop()
+
+
+@pytest.mark.anyio
+async def test_add_waits_while_the_buffer_is_full():
+    collection = make_collection()
+    buffer = WriteBehindBuffer(collection, batch_size=2, flush_interval=60, max_pending=4)
+    buffer.start()
+    await asyncio.wait_for(buffer.add({"n": i} for i in range(20)), timeout=5)
+    assert len(buffer._pending) <= 4
+    await buffer.stop()
+    assert await collection.count_documents({}) == 20
+
+
+@pytest.mark.anyio
+async def test_rejected_documents_are_counted_and_dropped():
+    collection = make_collection()
+    await collection.create_index("n", unique=True)
+    buffer = WriteBehindBuffer(collection, batch_size=10)
+    await buffer.add([{"n": 1}, {"n": 1}, {"n": 2}])
+    await buffer.flush()
+    assert buffer.stats() == {"pending": 0, "written": 2, "failed": 1}
+
+
+class FailingCollection:
+    def __init__(self, failures):
+        self.failures = failures
+        self.inserted = []
+
+    async def insert_many(self, docs, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("primary stepped down")
+        self.inserted.extend(docs)
+        return type("Result", (), {"inserted_ids": list(range(len(docs)))})()
+
+
+@pytest.mark.anyio
+async def test_failed_flush_keeps_the_batch_for_retry():
+    collection = FailingCollection(failures=1)
+    buffer = WriteBehindBuffer(collection, batch_size=10)
+    await buffer.add([{"n": 1}, {"n": 2}])
+    with pytest.raises(ConnectionError):
+        await buffer.flush()
+    assert buffer.stats()["pending"] == 2
+    await buffer.flush()
+    assert collection.inserted == [{"n": 1}, {"n": 2}]